@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import time
@@ -11,7 +12,14 @@ from dotenv import load_dotenv
 from loguru import logger
 
 # Import the existing agent
-from scripts.agent import agent, agent_config
+from scripts.agent import agent, memory_write_queue, session_manager, tool_executor
+from scripts.sessions import SessionUserMismatch
+from scripts.response_cache import response_cache
+from scripts.llm import llm_latency
+from scripts.speculation import speculation_manager
+from services.http_client import http_client
+from services.rate_limiter import rate_limiter
+from tools.cache import tool_cache
 
 load_dotenv()
 
@@ -81,14 +89,42 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+@app.on_event("startup")
+async def bound_blocking_io():
+    """Run sync tools and to_thread calls on the bounded tool pool."""
+    asyncio.get_running_loop().set_default_executor(tool_executor)
+
+@app.on_event("shutdown")
+async def flush_memory_writes():
+    """Persist queued Mem0 writes before the worker exits."""
+    memory_write_queue.shutdown()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close the pooled keep-alive connections used by the tools."""
+    await http_client.aclose()
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics():
+    """Hit/miss counters for the latency optimizations."""
+    return {
+        "speculation": speculation_manager.stats(),
+        "response_cache": response_cache.stats(),
+        "llm": llm_latency.stats(),
+        "tool_cache": tool_cache.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "active_sessions": session_manager.active_sessions(),
+    }
+
 @app.post("/llm/stream")
 async def llm_stream(
     payload: ChatRequest,
     session_id: str = Query(..., description="Session ID (Thread ID)"),
+    user_id: Optional[str] = Query(None, description="User ID for long-term memory - bound when the session is created"),
 ):
     """
     Streaming LLM endpoint for Anam.
@@ -103,6 +139,13 @@ async def llm_stream(
     if not user_message:
         raise HTTPException(status_code=400, detail="No user message found")
 
+    # Isolated configuration for this session - concurrent requests never share it.
+    # The session keeps the user it was created for; a different user_id is refused
+    try:
+        config, session_user = session_manager.open(session_id, user_id)
+    except SessionUserMismatch as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
     async def event_generator():
         chunk_count = 0
         llm_start_time = time.time()
@@ -117,13 +160,9 @@ async def llm_stream(
             
             logger.info(f"👂 Processing {len(langchain_messages)} messages, last: {user_message[:50]}...")
             
-            # Prepare configuration with session_id
-            config = agent_config.copy()
-            config["configurable"]["thread_id"] = session_id
-
             # Streaming events with full message history
             async for event in agent.astream_events(
-                {"messages": langchain_messages},
+                {"messages": langchain_messages, "user_id": session_user},
                 config=config,
                 version="v1",
             ):
@@ -133,6 +172,10 @@ async def llm_stream(
                 # But since it's an agent, it might call tools first.
                 # Simplest for Anam: Stream the final answer chunks.
                 
+                # Routing and summarization calls are internal - never speak them
+                if "internal" in event.get("tags", []):
+                    continue
+                
                 if kind == "on_chat_model_stream":
                     content = event["data"]["chunk"].content
                     if content:
@@ -147,6 +190,16 @@ async def llm_stream(
                         payload = json.dumps({"content": cleaned_content})
                         yield f"data: {payload}\n\n"
             
+            # Cached and templated answers finish without streaming any tokens
+            if chunk_count == 0:
+                final_state = await agent.aget_state(config)
+                final_messages = final_state.values.get("messages", [])
+                if final_messages:
+                    content = clean_text_for_tts(final_messages[-1].content)
+                    logger.info(f"💬 Final answer sent without streaming ({len(content)} chars)")
+                    chunk_count += 1
+                    yield f"data: {json.dumps({'content': content})}\n\n"
+            
             # Log performance metrics
             llm_end_time = time.time()
             llm_time = llm_end_time - llm_start_time
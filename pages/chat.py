@@ -1,5 +1,7 @@
+import uuid
+
 import streamlit as st
-from scripts.agent import agent, agent_config
+from scripts.agent import agent, session_manager
 
 # Suggestions for the user
 SUGGESTIONS = [
@@ -20,11 +22,16 @@ if "messages" not in st.session_state:
 if "processing" not in st.session_state:
     st.session_state.processing = False
 
+# Every browser session gets its own conversation thread
+if "session_id" not in st.session_state:
+    st.session_state.session_id = f"streamlit-{uuid.uuid4().hex}"
+
 # Layout for clear button
 _, col2 = st.columns([6, 1])
 with col2:
     if st.button("Restart↺", type="secondary", help="Clear chat history"):
         st.session_state.messages = []
+        st.session_state.session_id = f"streamlit-{uuid.uuid4().hex}"
         st.rerun()
 
 # Display suggestions in sidebar if chat is empty
@@ -75,9 +82,10 @@ if user_input:
             
             with st.spinner("Thinking..."):
                 # Invoke agent with full conversation history
+                config, user_id = session_manager.open(st.session_state.session_id)
                 agent_reply = agent.invoke(
-                    {"messages": langchain_messages},
-                    config=agent_config,
+                    {"messages": langchain_messages, "user_id": user_id},
+                    config=config,
                 )
                 
                 # Extract only the final assistant response content
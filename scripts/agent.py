@@ -1,68 +1,113 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+import atexit
+import contextvars
+import importlib
 import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from loguru import logger
 from typing import Annotated, Literal, List, Dict
 from typing_extensions import TypedDict
 
 from langchain_cerebras import ChatCerebras
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, convert_to_messages
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 from langgraph.prebuilt import create_react_agent
-from mem0 import MemoryClient
-
-# Import tools from the tools package
-from tools.tavily_tool import tavily_tool
-from tools.stock_tools import get_stock_price, get_company_info
-from tools.weather_tool import get_weather
-from tools.flight_tool import search_flights
-from tools.hotel_tool import search_hotels
-from tools.database_tool import database_search
-from tools.shop_tool import shopping_search
-from tools.job_search_tool import job_search
-from tools.memory_tool import search_memories, get_all_memories
-from tools.recipe_tool import search_recipes
+
+from scripts.checkpointer import create_checkpointer, CHECKPOINTER
+from scripts.dispatch import plan_direct_call, is_tool_error, DIRECT_DISPATCH_RENDER, DIRECT_TOOLS
+from scripts.history import plan_compaction, summary_request, with_history_budget
+from scripts.llm import HedgedChatModel, build_fallback_model, LLM_MAX_RETRIES, LLM_REQUEST_TIMEOUT
+from scripts.memory_queue import MemoryWriteQueue
+from scripts.response_cache import response_cache, RESPONSE_CACHE_AGENTS, RESPONSE_CACHE_ENABLED
+from scripts.router import router, ROUTER_MODE
+from scripts.sessions import SessionManager
+from scripts.speculation import speculation_manager, SPECULATIVE_ENABLED, SPECULATIVE_MIN_SCORE
+from services.tracing import trace_handler, tracer
+from services.cassette import cassette
+from services.memory_service import memory_service
+from tools.output import output_mode, current_output_mode
 
 load_dotenv()
 
 # ==========================
 # 1. LLM MODEL (CEREBRAS)
 # ==========================
-model = ChatCerebras(
-    model="gpt-oss-120b",
-    max_tokens=512,
-    api_key=os.getenv("CEREBRAS_API_KEY"),
-    temperature=0.3,
+# Per-node deadlines, hedged requests and an optional fallback model (see scripts/llm.py)
+model = HedgedChatModel(
+    primary=ChatCerebras(
+        model="gpt-oss-120b",
+        max_tokens=512,
+        api_key=os.getenv("CEREBRAS_API_KEY"),
+        temperature=0.3,
+        timeout=LLM_REQUEST_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        # Record/replay for offline benchmarks (see services/cassette.py)
+        **cassette.llm_client_kwargs(),
+    ),
+    fallback=build_fallback_model(max_tokens=512, temperature=0.3),
 )
 
-# Initialize Mem0 Memory Client
-mem0 = MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
+# Internal calls (routing, summaries) - tagged so their tokens are never streamed to the user
+internal_model = model.with_config(tags=["internal"])
+
+# Bounded pool for blocking tool I/O - installed as the event loop's default executor by backend.py
+tool_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TOOL_MAX_WORKERS", "16")),
+    thread_name_prefix="tool-io",
+)
 
 # ==========================
 # 2. DEFINE STATE
 # ==========================
+def merge_branch_results(left: list, right: list) -> list:
+    """Reducer for parallel branch answers - writing None clears them for a new turn."""
+    if right is None:
+        return []
+    return (left or []) + right
+
 class AgentState(TypedDict):
     messages: Annotated[list, "The messages in the conversation"]
     next: str
     user_id: str  # User ID for memory management
+    memory_context: list  # Mem0 context fetched once per turn (None when not fetched)
+    summary: str  # Running summary of turns folded out of the verbatim window
+    summarized_count: int  # Leading client messages already folded into the summary
+    agents: list  # Specialists selected for a fan-out turn
+    branch_results: Annotated[list, merge_branch_results]  # Answers from fan-out branches
+    speculation_id: str  # Id of this turn's speculative specialist run (None when not speculating)
+    direct_call: dict  # Tool + arguments for a directly dispatched lookup (see scripts/dispatch.py)
 
 # ==========================
 # 3. MEMORY FUNCTIONS
 # ==========================
 
+# Runs per-turn Mem0 searches alongside the routing decision
+memory_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mem0-prefetch")
+
+def get_last_message_content(messages: list) -> str:
+    """Return the text of the latest message (LangChain message or role/content dict)."""
+    if not messages:
+        return ''
+    last = messages[-1]
+    if hasattr(last, 'content'):
+        return last.content
+    if isinstance(last, dict):
+        return last.get('content', '')
+    return ''
+
 def retrieve_memory_context(query: str, user_id: str) -> List[Dict]:
-    """Retrieve relevant context from Mem0"""
+    """Retrieve relevant context from the memory backend (Mem0 or local)"""
     try:
-        # Mem0 v2 API requires filters
-        filters = {
-            "OR": [
-                {
-                    "user_id": user_id
-                }
-            ]
-        }
-        
-        memories = mem0.search(query, version="v2", filters=filters)
+        memories = memory_service.search(query, user_id)
         memory_list = memories.get('results', [])
         
         if memory_list:
@@ -79,126 +124,404 @@ def retrieve_memory_context(query: str, user_id: str) -> List[Dict]:
         logger.error(f"Error retrieving memories: {e}")
         return []
 
+def write_interaction_to_memory(interaction: List[Dict], user_id: str):
+    """Write messages to the memory backend (runs on the write-behind queue's worker thread)"""
+    result = memory_service.add(interaction, user_id)
+    logger.info(f"Memory saved successfully: {len(result.get('results', []))} memories added")
+
+# Memory writes happen in the background so they never delay the reply
+memory_write_queue = MemoryWriteQueue(write_interaction_to_memory)
+atexit.register(memory_write_queue.shutdown)
+
 def save_interaction_to_memory(user_id: str, user_input: str, assistant_response: str):
-    """Save the interaction to Mem0"""
-    try:
-        interaction = [
-            {
-                "role": "user",
-                "content": user_input
-            },
-            {
-                "role": "assistant",
-                "content": assistant_response
-            }
-        ]
-        result = mem0.add(interaction, user_id=user_id)
-        logger.info(f"Memory saved successfully: {len(result.get('results', []))} memories added")
-    except Exception as e:
-        logger.error(f"Error saving interaction: {e}")
+    """Queue the interaction for saving to Mem0"""
+    interaction = [
+        {
+            "role": "user",
+            "content": user_input
+        },
+        {
+            "role": "assistant",
+            "content": assistant_response
+        }
+    ]
+    memory_write_queue.enqueue(user_id, interaction)
 
 # ==========================
-# 4. CREATE SPECIALIZED AGENTS
+# 4. SPECIALIZED AGENTS (LAZY REGISTRY)
 # ==========================
 
-# Research Agent - handles web searches and general information
-research_agent = create_react_agent(
-    model=model,
-    tools=[tavily_tool],
-    prompt="You are a research specialist. Use web search to general or current information."
-            "Provide direct and straightforward answers without unnecessary fluff. Get straight to the point."
-)
+# Tools are given as (module, attribute) so a specialist's tool modules - and
+# their SDKs (serpapi, yfinance, chroma, pyowm, ...) - are imported on first use
+AGENT_SPECS = {
+    # Research Agent - handles web searches and general information
+    "research_agent": {
+        "tools": [("tools.tavily_tool", "tavily_tool")],
+        "prompt": "You are a research specialist. Use web search to general or current information."
+                  "Provide direct and straightforward answers without unnecessary fluff. Get straight to the point.",
+    },
+    # Finance Agent - handles stock prices and company information
+    "finance_agent": {
+        "tools": [("tools.stock_tools", "get_stock_price"), ("tools.stock_tools", "get_stock_prices"), ("tools.stock_tools", "get_company_info")],
+        "prompt": "You are a financial analyst. Provide stock prices, company information, "
+                  "and financial data. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point.",
+    },
+    # Travel Agent - handles weather, flights, and hotels
+    "travel_agent": {
+        "tools": [("tools.weather_tool", "get_weather"), ("tools.weather_tool", "get_weather_multi"), ("tools.flight_tool", "search_flights"), ("tools.flight_tool", "search_flights_range"), ("tools.hotel_tool", "search_hotels")],
+        "prompt": "You are a travel specialist. Help with weather information, flight bookings, "
+                  "and hotel reservations. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point.",
+    },
+    # Database Agent - handles internal knowledge and document queries
+    "database_agent": {
+        "tools": [("tools.database_tool", "database_search")],
+        "prompt": "You are a knowledge base specialist. Search internal documents, manuals, "
+                  "and other information. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point.",
+    },
+    # Shopping Agent - handles product searches and shopping
+    "shopping_agent": {
+        "tools": [("tools.shop_tool", "shopping_search")],
+        "prompt": "You are a shopping assistant. Search for products, prices, and reviews using Google Shopping. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point.",
+    },
+    # Job Agent - handles job postings and career opportunities
+    "job_agent": {
+        "tools": [("tools.job_search_tool", "job_search")],
+        "prompt": "You are a career specialist. Search for job postings, employment opportunities, and career openings. Provide direct and straightforward answers regarding job roles, companies, and requirements.",
+    },
+    # Memory Agent - handles memory retrieval and past conversation queries
+    "memory_agent": {
+        "tools": [("tools.memory_tool", "search_memories"), ("tools.memory_tool", "get_all_memories")],
+        "prompt": "You are a memory specialist. Help users recall past conversations, preferences, and stored information. Use search_memories to find specific information and get_all_memories when users ask what you remember about them.",
+    },
+    # Recipe Agent - handles recipe searches
+    "recipe_agent": {
+        "tools": [("tools.recipe_tool", "search_recipes")],
+        "prompt": "You are a culinary specialist. Search for recipes, cooking instructions, and ingredient lists. Provide direct and straightforward answers with ratings, cooking times, and sources.",
+    },
+}
+
+class SpecialistRegistry:
+    """Builds each specialist ReAct agent (and imports its tools) on first use."""
+
+    def __init__(self, specs: Dict[str, Dict]):
+        self.specs = specs
+        self.timings: Dict[str, float] = {}
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        specialist = self._agents.get(name)
+        if specialist is not None:
+            return specialist
+        with self._lock:
+            if name not in self._agents:
+                started = time.perf_counter()
+                spec = self.specs[name]
+                tools = [getattr(importlib.import_module(module), attr) for module, attr in spec["tools"]]
+                self._agents[name] = create_react_agent(model=model, tools=tools, prompt=spec["prompt"])
+                self.timings[name] = time.perf_counter() - started
+                logger.info(f"Built {name} in {self.timings[name]:.2f}s")
+            return self._agents[name]
+
+    def warm_up(self):
+        """Build every specialist plus the router centroids and Mem0 client ahead of traffic."""
+        started = time.perf_counter()
+        for name in self.specs:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Warm-up failed for {name}: {e}")
+        try:
+            if ROUTER_MODE == "embedding":
+                router.scores("warm up")
+            memory_service.client
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}")
+        details = ", ".join(f"{name}={secs:.2f}s" for name, secs in self.timings.items())
+        logger.info(f"⚡ Warm-up done in {time.perf_counter() - started:.2f}s ({details})")
+
+specialist_registry = SpecialistRegistry(AGENT_SPECS)
 
-# Finance Agent - handles stock prices and company information
-finance_agent = create_react_agent(
-    model=model,
-    tools=[get_stock_price, get_company_info],
-    prompt="You are a financial analyst. Provide stock prices, company information, "
-           "and financial data. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point."
-)
+# ==========================
+# 5. DEFINE AGENT NODES
+# ==========================
 
-# Travel Agent - handles weather, flights, and hotels
-travel_agent = create_react_agent(
-    model=model,
-    tools=[get_weather, search_flights, search_hotels],
-    prompt="You are a travel specialist. Help with weather information, flight bookings, "
-           "and hotel reservations. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point."
-)
+def make_agent_node(name: str):
+    """Wrap a specialist agent as a graph node with sync and native async paths."""
+    def specialist_input(state: AgentState):
+        messages = convert_to_messages(state["messages"])
+        context = with_history_budget(messages, state.get("summary", ""), name)
+        specialist = specialist_registry.get(name)
+        # Fan-out branch answers are only an input to the merge node - don't stream them
+        runner = specialist.with_config(tags=["internal"]) if state.get("next") == "fanout" else specialist
+        return messages, context, runner
+
+    def specialist_output(state: AgentState, messages, context, result):
+        new_messages = result["messages"][len(context):]
+        if state.get("next") == "fanout":
+            # Parallel branch - hand the answer to the merge node instead of replying
+            return {"branch_results": [{"agent": name, "answer": new_messages[-1].content}]}
+        remember_answer(name, state.get("user_id", "samantha"), messages, new_messages[-1].content)
+        return {"messages": messages + new_messages, "next": "FINISH"}
+
+    def committed_speculation(state: AgentState):
+        if state.get("next") == "fanout":
+            return None
+        return speculation_manager.take(state.get("speculation_id"), name)
+
+    def node(state: AgentState):
+        messages, context, runner = specialist_input(state)
+        result = runner.invoke({"messages": context})
+        return specialist_output(state, messages, context, result)
+
+    async def anode(state: AgentState):
+        messages, context, runner = specialist_input(state)
+        result = None
+        future = committed_speculation(state)
+        if future is not None:
+            try:
+                result = await future
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError) and not future.cancelled():
+                    raise
+                logger.warning(f"Speculative {name} run failed, running it again: {e!r}")
+        if result is None:
+            result = await runner.ainvoke({"messages": context})
+        return specialist_output(state, messages, context, result)
+
+    return RunnableLambda(node, afunc=anode)
+
+research_node = make_agent_node("research_agent")
+finance_node = make_agent_node("finance_agent")
+travel_node = make_agent_node("travel_agent")
+database_node = make_agent_node("database_agent")
+shopping_node = make_agent_node("shopping_agent")
+job_node = make_agent_node("job_agent")
+memory_node = make_agent_node("memory_agent")
+recipe_node = make_agent_node("recipe_agent")
 
-# Database Agent - handles internal knowledge and document queries
-database_agent = create_react_agent(
-    model=model,
-    tools=[database_search],
-    prompt="You are a knowledge base specialist. Search internal documents, manuals, "
-           "and other information. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point."
-)
+# ==========================
+# 6. SMALL-TALK FAST PATH
+# ==========================
 
-# Shopping Agent - handles product searches and shopping
-shopping_agent = create_react_agent(
-    model=model,
-    tools=[shopping_search],
-    prompt="You are a shopping assistant. Search for products, prices, and reviews using Google Shopping. Provide direct and straightforward answers without unnecessary fluff. Get straight to the point."
-)
+# Greetings and acknowledgements skip routing, memory and the main LLM call entirely
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+FAST_PATH_MODE = os.getenv("FAST_PATH_MODE", "template").lower()  # "template" or "llm"
+FAST_PATH_MAX_WORDS = int(os.getenv("FAST_PATH_MAX_WORDS", "4"))
+
+FAST_PATH_PATTERNS = {
+    "greeting": r"(hi|hello|hey|hiya|howdy|namaste|good (morning|afternoon|evening))",
+    "thanks": r"(thanks|thanks a lot|thank you|thank you so much|thank you very much|thx|ty|cheers)",
+    "ack": r"(ok|okay|k|cool|great|nice|got it|alright|all right|sure|fine|awesome|perfect|sounds good)",
+    "goodbye": r"(bye|goodbye|bye bye|see you|see ya|good night)",
+}
+# Words allowed after the phrase ("hi samantha", "thanks again") - anything else is real content
+FAST_PATH_ADDRESS = r"(samantha|there|again)"
+# Extra deployment-specific acknowledgements, e.g. FAST_PATH_EXTRA_ACKS="haan,theek hai"
+FAST_PATH_EXTRA_ACKS = [p.strip().lower() for p in os.getenv("FAST_PATH_EXTRA_ACKS", "").split(",") if p.strip()]
+
+FAST_PATH_TEMPLATES = {
+    "greeting": "Hi! How can I help you today?",
+    "thanks": "You're welcome! Anything else I can help with?",
+    "ack": "Great. Let me know if you need anything else.",
+    "goodbye": "Goodbye! Talk to you soon.",
+}
+
+quick_model = model.bind(max_tokens=60)
+
+def classify_small_talk(text: str):
+    """Return the small-talk category for short greetings/acknowledgements, else None."""
+    normalized = " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+    if not normalized or len(normalized.split()) > FAST_PATH_MAX_WORDS:
+        return None
+    if normalized in FAST_PATH_EXTRA_ACKS:
+        return "ack"
+    for category, pattern in FAST_PATH_PATTERNS.items():
+        # The phrase, optionally followed by an address like "samantha" or "there"
+        if re.fullmatch(rf"{pattern}(\s+{FAST_PATH_ADDRESS})?", normalized):
+            return category
+    return None
+
+def preroute(state: AgentState) -> str:
+    """Deterministic pre-router: obvious small talk goes straight to quick_respond."""
+    if FAST_PATH_ENABLED:
+        messages = convert_to_messages(state["messages"])
+        # "sure" / "ok" answering the assistant's question is a reply, not small talk
+        answers_question = (
+            len(messages) > 1 and isinstance(messages[-2], AIMessage)
+            and str(messages[-2].content).rstrip().endswith("?")
+        )
+        if messages and isinstance(messages[-1], HumanMessage) and not answers_question:
+            category = classify_small_talk(get_last_message_content(messages))
+            if category:
+                logger.info(f"Fast path: {category}")
+                return "quick_respond"
+    return "cache_lookup"
+
+def quick_respond_node(state: AgentState):
+    """Answer small talk from a template (or one short LLM call) - no memory lookup or write."""
+    messages = convert_to_messages(state["messages"])
+    category = classify_small_talk(get_last_message_content(messages)) or "ack"
+    if FAST_PATH_MODE == "llm":
+        response = quick_model.invoke([SystemMessage(content=respond_system_prompt)] + messages[-4:])
+    else:
+        response = AIMessage(content=FAST_PATH_TEMPLATES[category])
+    return {"messages": messages + [response], "next": "FINISH"}
+
+async def aquick_respond_node(state: AgentState):
+    """Async variant of quick_respond_node."""
+    messages = convert_to_messages(state["messages"])
+    if FAST_PATH_MODE == "llm":
+        response = await quick_model.ainvoke([SystemMessage(content=respond_system_prompt)] + messages[-4:])
+        return {"messages": messages + [response], "next": "FINISH"}
+    return quick_respond_node(state)
 
-# Job Agent - handles job postings and career opportunities
-job_agent = create_react_agent(
-    model=model,
-    tools=[job_search],
-    prompt="You are a career specialist. Search for job postings, employment opportunities, and career openings. Provide direct and straightforward answers regarding job roles, companies, and requirements."
-)
+# ==========================
+# 7. SEMANTIC RESPONSE CACHE
+# ==========================
 
-# Memory Agent - handles memory retrieval and past conversation queries
-memory_agent = create_react_agent(
-    model=model,
-    tools=[search_memories, get_all_memories],
-    prompt="You are a memory specialist. Help users recall past conversations, preferences, and stored information. Use search_memories to find specific information and get_all_memories when users ask what you remember about them."
-)
+def remember_answer(node_name: str, user_id: str, messages: list, answer: str):
+    """Store a finished answer to the latest message when the node's answers are cacheable."""
+    if not RESPONSE_CACHE_ENABLED or node_name not in RESPONSE_CACHE_AGENTS:
+        return
+    try:
+        response_cache.store(user_id, messages, answer)
+    except Exception as e:
+        logger.error(f"Error caching response: {e}")
 
-# Recipe Agent - handles recipe searches
-recipe_agent = create_react_agent(
-    model=model,
-    tools=[search_recipes],
-    prompt="You are a culinary specialist. Search for recipes, cooking instructions, and ingredient lists. Provide direct and straightforward answers with ratings, cooking times, and sources."
-)
+def cache_lookup_node(state: AgentState):
+    """Answer repeated questions from the cache - skips routing, memory lookup and generation."""
+    if not RESPONSE_CACHE_ENABLED:
+        return {"next": "compact"}
+    messages = state["messages"]
+    try:
+        answer = response_cache.lookup(state.get("user_id", "samantha"), messages)
+    except Exception as e:
+        logger.error(f"Response cache lookup failed: {e}")
+        answer = None
+    if answer is None:
+        return {"next": "compact"}
+    return {"messages": convert_to_messages(messages) + [AIMessage(content=answer)], "next": "FINISH"}
+
+async def acache_lookup_node(state: AgentState):
+    """Async variant of cache_lookup_node - embedding runs off the event loop."""
+    return await asyncio.to_thread(cache_lookup_node, state)
 
 # ==========================
-# 5. DEFINE AGENT NODES
+# 8. HISTORY COMPACTION
+# ==========================
+
+def start_compaction(state: AgentState):
+    """Return (messages, summary, summarized_count, plan) for this turn's history."""
+    messages = convert_to_messages(state["messages"])
+    summary = state.get("summary") or ""
+    summarized_count = state.get("summarized_count") or 0
+    if len(messages) <= summarized_count:
+        # The client started a new conversation on this thread
+        summary, summarized_count = "", 0
+    return messages, summary, summarized_count, plan_compaction(messages, summarized_count)
+
+def finish_compaction(messages, summary, summarized_count, plan, new_summary=None):
+    if plan is None:
+        return {"messages": messages[summarized_count:], "summary": summary, "summarized_count": summarized_count}
+    _, recent, new_count = plan
+    logger.info(f"Folded {new_count - summarized_count} messages into the conversation summary")
+    return {"messages": recent, "summary": new_summary, "summarized_count": new_count}
+
+def compact_node(state: AgentState):
+    """Keep the last turns verbatim and fold older ones into the running summary."""
+    messages, summary, summarized_count, plan = start_compaction(state)
+    if plan is None:
+        return finish_compaction(messages, summary, summarized_count, plan)
+    response = internal_model.invoke(summary_request(summary, plan[0]))
+    return finish_compaction(messages, summary, summarized_count, plan, response.content)
+
+async def acompact_node(state: AgentState):
+    """Async variant of compact_node."""
+    messages, summary, summarized_count, plan = start_compaction(state)
+    if plan is None:
+        return finish_compaction(messages, summary, summarized_count, plan)
+    response = await internal_model.ainvoke(summary_request(summary, plan[0]))
+    return finish_compaction(messages, summary, summarized_count, plan, response.content)
+
+# ==========================
+# 9. DIRECT TOOL DISPATCH
 # ==========================
 
-def research_node(state: AgentState):
-    result = research_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+# Simple stock / weather / recipe lookups run their tool straight away instead of a ReAct loop
+direct_model = model.bind(max_tokens=300)
 
-def finance_node(state: AgentState):
-    result = finance_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+direct_system_prompt = """You are Samantha. Answer the user's question using the tool result below.
+Provide direct and straightforward answers without unnecessary fluff. Get straight to the point."""
 
-def travel_node(state: AgentState):
-    result = travel_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+def load_direct_tool(tool_name: str):
+    _, module, attr = DIRECT_TOOLS[tool_name]
+    return getattr(importlib.import_module(module), attr)
 
-def database_node(state: AgentState):
-    result = database_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+def direct_output_mode() -> str:
+    # A template reply is the tool output itself, so it keeps the user-facing formatting
+    return current_output_mode() if DIRECT_DISPATCH_RENDER == "llm" else "rich"
 
-def shopping_node(state: AgentState):
-    result = shopping_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+def direct_request(messages, result: str):
+    return [
+        SystemMessage(content=direct_system_prompt),
+        HumanMessage(content=f"User request: {get_last_message_content(messages)}\n\nTool result:\n{result}"),
+    ]
 
-def job_node(state: AgentState):
-    result = job_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+def finish_direct(state: AgentState, messages, call: dict, response):
+    logger.info(f"Direct dispatch answered with {call['tool']}({call['args']})")
+    remember_answer(call["agent"], state.get("user_id", "samantha"), messages, response.content)
+    return {"messages": messages + [response], "next": "FINISH"}
 
-def memory_node(state: AgentState):
-    result = memory_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+# Marks a turn whose direct call failed - the supervisor then routes it without dispatching again
+DIRECT_FALLBACK = {"fallback": True}
 
-def recipe_node(state: AgentState):
-    result = recipe_agent.invoke(state)
-    return {"messages": result["messages"], "next": "FINISH"}
+def plan_turn_direct_call(state: AgentState, last_message: str):
+    if state.get("direct_call") == DIRECT_FALLBACK:
+        return None
+    return plan_direct_call(last_message)
+
+def direct_node(state: AgentState):
+    """Run the extracted tool call and render it - no tool-choosing or phrasing LLM round trips."""
+    call = state["direct_call"]
+    messages = convert_to_messages(state["messages"])
+    try:
+        with output_mode(direct_output_mode()):
+            result = load_direct_tool(call["tool"]).invoke(call["args"])
+    except Exception as e:
+        logger.warning(f"Direct {call['tool']} call failed: {e}")
+        result = ""
+    if is_tool_error(result):
+        # The pattern may have misread the request - let the supervisor route it properly
+        logger.info(f"Direct {call['tool']} failed, re-routing through the supervisor")
+        return {"next": "supervisor", "direct_call": DIRECT_FALLBACK}
+    if DIRECT_DISPATCH_RENDER == "llm":
+        response = direct_model.invoke(direct_request(messages, result))
+    else:
+        response = AIMessage(content=result)
+    return finish_direct(state, messages, call, response)
+
+async def adirect_node(state: AgentState):
+    """Async variant of direct_node."""
+    call = state["direct_call"]
+    messages = convert_to_messages(state["messages"])
+    try:
+        with output_mode(direct_output_mode()):
+            result = await load_direct_tool(call["tool"]).ainvoke(call["args"])
+    except Exception as e:
+        logger.warning(f"Direct {call['tool']} call failed: {e}")
+        result = ""
+    if is_tool_error(result):
+        logger.info(f"Direct {call['tool']} failed, re-routing through the supervisor")
+        return {"next": "supervisor", "direct_call": DIRECT_FALLBACK}
+    if DIRECT_DISPATCH_RENDER == "llm":
+        response = await direct_model.ainvoke(direct_request(messages, result))
+    else:
+        response = AIMessage(content=result)
+    return finish_direct(state, messages, call, response)
 
 # ==========================
-# 6. SUPERVISOR AGENT
+# 10. SUPERVISOR AGENT
 # ==========================
 
 # Define available agents
@@ -223,75 +546,276 @@ For greetings like "hello", "hi", introductions, or simple questions you can ans
 For queries about past conversations like "what do you remember?", "what do you know about me?", use "memory_agent".
 For recipe queries like "how to make pasta", "recipe for cheesecake", use "recipe_agent".
 For queries needing specific tools, route to the appropriate specialist agent.
+If the query clearly needs more than one specialist (e.g. "Apple's stock price and the weather in Goa"),
+list every specialist needed separated by commas, e.g. "finance_agent, travel_agent".
 
 Respond ONLY with the name of the next agent to use.
 """
+
+# Fan-out: run several specialists in parallel branches for compound queries
+FANOUT_ENABLED = os.getenv("FANOUT_ENABLED", "true").lower() == "true"
+FANOUT_MAX_AGENTS = int(os.getenv("FANOUT_MAX_AGENTS", "3"))
+specialists = [m for m in members if m not in ("respond", "FINISH")]
     
+def collect_memory_context(memory_future, next_agent: str):
+    """Wait for the prefetched memory context only when the next node reads it."""
+    if next_agent == "respond":
+        return memory_future.result()
+    # Specialists don't read memory context - don't keep the turn waiting on it
+    memory_future.cancel()
+    return None
+
+async def acollect_memory_context(memory_future, next_agent: str):
+    """Async variant of collect_memory_context for an asyncio-wrapped future."""
+    if next_agent == "respond":
+        return await memory_future
+    memory_future.cancel()
+    return None
+
+def route_locally(last_message: str):
+    """Ask the embedding router for a decision.
+
+    Returns (decision, prediction): the decision is None when the router is
+    unsure or disabled; the prediction is its best (agent, score) guess, used
+    for speculative execution.
+    """
+    if ROUTER_MODE != "embedding" and not SPECULATIVE_ENABLED:
+        return None, None
+    try:
+        # Compound queries go to the supervisor LLM, the only path that can fan out
+        local_choice, prediction = router.route_with_prediction(last_message, multi_intent=FANOUT_ENABLED)
+    except Exception as e:
+        logger.error(f"Embedding router failed: {e}")
+        return None, None
+    if ROUTER_MODE != "embedding":
+        local_choice = None
+    if local_choice:
+        logger.info(f"Supervisor routing to: {local_choice} (local)")
+    return local_choice, prediction
+
+def speculation_input(state: AgentState, prediction):
+    """Return (agent, runner, input) for a speculative run, or None when not worth it."""
+    if not SPECULATIVE_ENABLED or prediction is None:
+        return None
+    agent_name, score = prediction
+    if agent_name not in specialists or score < SPECULATIVE_MIN_SCORE:
+        return None
+    messages = convert_to_messages(state["messages"])
+    context = with_history_budget(messages, state.get("summary", ""), agent_name)
+    # Tagged internal: a committed result is sent as the final message, never streamed twice
+    runner = specialist_registry.get(agent_name).with_config(tags=["internal"])
+    return agent_name, runner, {"messages": context}
+
+def astart_speculation(state: AgentState, prediction):
+    """Start the predicted specialist as an asyncio task. Returns the speculation id.
+
+    Async graph only - a task can be cancelled between steps when the guess is
+    wrong, while a sync run on a worker thread would finish its whole ReAct loop
+    (paid tool and LLM calls included) only to be discarded.
+    """
+    planned = speculation_input(state, prediction)
+    if planned is None:
+        return None
+    agent_name, runner, specialist_input = planned
+    speculation_id = str(uuid.uuid4())
+    speculation_manager.start(speculation_id, agent_name, asyncio.create_task(runner.ainvoke(specialist_input)))
+    return speculation_id
+
+def parse_routing_decision(content: str):
+    """Validate the supervisor LLM's answer - returns (next, agents selected for fan-out)."""
+    choices = [c.strip() for c in content.strip().split(",") if c.strip()]
+    fanout_agents = list(dict.fromkeys(c for c in choices if c in specialists))[:FANOUT_MAX_AGENTS]
+    if FANOUT_ENABLED and len(fanout_agents) > 1:
+        logger.info(f"Supervisor fanning out to: {', '.join(fanout_agents)}")
+        return "fanout", fanout_agents
+
+    next_agent = choices[0] if choices else ""
+    if next_agent not in members:
+        # Default to respond for conversational queries
+        logger.warning(f"Invalid routing decision: {content.strip()}. Defaulting to respond")
+        next_agent = "respond"
+    logger.info(f"Supervisor routing to: {next_agent}")
+    return next_agent, []
+
+def degraded_route(prediction, error: Exception):
+    """Routing when the supervisor LLM fails - the router's best guess, or a plain answer."""
+    if prediction is not None and prediction[0] in specialists and prediction[1] >= SPECULATIVE_MIN_SCORE:
+        next_agent = prediction[0]
+    else:
+        next_agent = "respond"
+    logger.warning(f"Supervisor LLM failed ({error!r}) - routing to {next_agent}")
+    return next_agent, []
+
 def supervisor_node(state: AgentState):
-    """The supervisor routes to the appropriate agent with memory context."""
+    """The supervisor routes to the appropriate agent and prefetches the turn's memory context."""
     messages = state["messages"]
     user_id = state.get("user_id", "samantha")
+    last_message = get_last_message_content(messages)
     
-    # Retrieve memory context for better routing decisions
-    last_message = messages[-1].content if messages and hasattr(messages[-1], 'content') else (messages[-1].get('content', '') if messages and isinstance(messages[-1], dict) else '')
-    memory_context = retrieve_memory_context(last_message, user_id)
+    # Simple lookups with extractable arguments skip routing and the ReAct loop entirely
+    direct_call = plan_turn_direct_call(state, last_message)
+    if direct_call:
+        return {"next": "direct", "direct_call": direct_call, "speculation_id": None, "memory_context": None}
     
-    # Create routing prompt with memory context
-    routing_messages = [
-        SystemMessage(content=supervisor_prompt),
-    ] + memory_context + messages
+    # Start the Mem0 search now so it overlaps with the routing decision
+    memory_future = memory_executor.submit(contextvars.copy_context().run, retrieve_memory_context, last_message, user_id)
     
-    # Get supervisor decision
-    response = model.invoke(routing_messages)
-    next_agent = response.content.strip()
-    
-    # Validate the response
-    if next_agent not in members:
-        # Default to respond for conversational queries
-        logger.warning(f"Invalid routing decision: {next_agent}. Defaulting to respond")
-        next_agent = "respond"
+    # Try the local embedding router first - skips the LLM call for unambiguous queries
+    local_choice, prediction = route_locally(last_message)
+    if local_choice:
+        return {
+            "next": local_choice,
+            "direct_call": None,
+            "speculation_id": None,
+            "memory_context": collect_memory_context(memory_future, local_choice),
+        }
     
-    logger.info(f"Supervisor routing to: {next_agent}")
+    # Get supervisor decision (no speculation here - see astart_speculation)
+    routing_messages = [SystemMessage(content=supervisor_prompt)] + with_history_budget(messages, state.get("summary", ""), "supervisor")
+    try:
+        response = internal_model.invoke(routing_messages)
+        next_agent, agents = parse_routing_decision(response.content)
+    except Exception as e:
+        next_agent, agents = degraded_route(prediction, e)
     
-    return {"next": next_agent}
-
-def respond_node(state: AgentState):
-    """Handles direct responses without tools - for greetings and simple queries with memory."""
+    return {
+        "next": next_agent,
+        "agents": agents,
+        "branch_results": None,
+        "direct_call": None,
+        "speculation_id": None,
+        "memory_context": collect_memory_context(memory_future, next_agent),
+    }
+
+async def asupervisor_node(state: AgentState):
+    """Async supervisor - same routing as supervisor_node without blocking the event loop."""
     messages = state["messages"]
     user_id = state.get("user_id", "samantha")
+    last_message = get_last_message_content(messages)
     
-    # Retrieve memory context
-    last_message = messages[-1].content if messages and hasattr(messages[-1], 'content') else (messages[-1].get('content', '') if messages and isinstance(messages[-1], dict) else '')
-    memory_context = retrieve_memory_context(last_message, user_id)
+    direct_call = plan_turn_direct_call(state, last_message)
+    if direct_call:
+        return {"next": "direct", "direct_call": direct_call, "speculation_id": None, "memory_context": None}
     
-    # Create a conversational response with memory context
-    system_prompt = """You are Samantha, a friendly and helpful AI assistant. 
+    memory_future = asyncio.wrap_future(memory_executor.submit(contextvars.copy_context().run, retrieve_memory_context, last_message, user_id))
+    
+    # Embedding the query is CPU-bound - keep it off the event loop
+    local_choice, prediction = await asyncio.to_thread(route_locally, last_message)
+    if local_choice:
+        return {
+            "next": local_choice,
+            "direct_call": None,
+            "speculation_id": None,
+            "memory_context": await acollect_memory_context(memory_future, local_choice),
+        }
+    
+    # Start the most likely specialist while the supervisor LLM decides
+    speculation_id = astart_speculation(state, prediction)
+    
+    routing_messages = [SystemMessage(content=supervisor_prompt)] + with_history_budget(messages, state.get("summary", ""), "supervisor")
+    try:
+        response = await internal_model.ainvoke(routing_messages)
+        next_agent, agents = parse_routing_decision(response.content)
+    except Exception as e:
+        next_agent, agents = degraded_route(prediction, e)
+    speculation_manager.resolve(speculation_id, next_agent)
+    
+    return {
+        "next": next_agent,
+        "agents": agents,
+        "branch_results": None,
+        "direct_call": None,
+        "speculation_id": speculation_id,
+        "memory_context": await acollect_memory_context(memory_future, next_agent),
+    }
+
+respond_system_prompt = """You are Samantha, a friendly and helpful AI assistant. 
     Respond naturally to greetings, introductions, and casual conversation. 
     Use the provided context from past conversations to personalize your responses.
     Provide direct and straightforward answers without unnecessary fluff. 
     Get straight to the point."""
+
+def respond_node(state: AgentState):
+    """Handles direct responses without tools - for greetings and simple queries with memory."""
+    messages = state["messages"]
+    user_id = state.get("user_id", "samantha")
+    last_message = get_last_message_content(messages)
     
-    response_prompt = [
-        SystemMessage(content=system_prompt)
-    ] + memory_context + messages
+    # Reuse the memory context prefetched during routing
+    memory_context = state.get("memory_context")
+    if memory_context is None:
+        memory_context = retrieve_memory_context(last_message, user_id)
     
-    # Use Cerebras for memory-enhanced responses
+    # Create a conversational response with memory context
+    response_prompt = [SystemMessage(content=respond_system_prompt)] + memory_context + with_history_budget(messages, state.get("summary", ""), "respond")
     response = model.invoke(response_prompt)
     
     # Save interaction to memory
     save_interaction_to_memory(user_id, last_message, response.content)
+    remember_answer("respond", user_id, messages, response.content)
+    
+    return {"messages": [response], "next": "FINISH"}
+
+async def arespond_node(state: AgentState):
+    """Async variant of respond_node."""
+    messages = state["messages"]
+    user_id = state.get("user_id", "samantha")
+    last_message = get_last_message_content(messages)
+    
+    memory_context = state.get("memory_context")
+    if memory_context is None:
+        memory_context = await asyncio.to_thread(retrieve_memory_context, last_message, user_id)
+    
+    response_prompt = [SystemMessage(content=respond_system_prompt)] + memory_context + with_history_budget(messages, state.get("summary", ""), "respond")
+    response = await model.ainvoke(response_prompt)
+    
+    save_interaction_to_memory(user_id, last_message, response.content)
+    remember_answer("respond", user_id, messages, response.content)
     
     return {"messages": [response], "next": "FINISH"}
 
+merge_system_prompt = """You are Samantha. Several specialists answered parts of the user's request.
+Combine their answers into one direct reply that covers every part of the question.
+Do not mention the specialists. Provide direct and straightforward answers without unnecessary fluff."""
+
+def merge_prompt(state: AgentState):
+    answers = "\n\n".join(f"[{r['agent']}]\n{r['answer']}" for r in state.get("branch_results") or [])
+    messages = convert_to_messages(state["messages"])
+    return messages, [
+        SystemMessage(content=merge_system_prompt),
+        HumanMessage(content=f"User request: {get_last_message_content(messages)}\n\nSpecialist answers:\n{answers}"),
+    ]
+
+def merge_node(state: AgentState):
+    """Compose one answer from the parallel fan-out branches."""
+    messages, prompt = merge_prompt(state)
+    response = model.invoke(prompt)
+    return {"messages": messages + [response], "next": "FINISH"}
+
+async def amerge_node(state: AgentState):
+    """Async variant of merge_node."""
+    messages, prompt = merge_prompt(state)
+    response = await model.ainvoke(prompt)
+    return {"messages": messages + [response], "next": "FINISH"}
+
+def route_from_supervisor(state: AgentState):
+    """Follow the supervisor's decision - one Send per specialist on fan-out turns."""
+    if state["next"] == "fanout":
+        return [Send(agent_name, state) for agent_name in state["agents"]]
+    return state["next"]
+
 # ==========================
-# 7. BUILD THE GRAPH
+# 11. BUILD THE GRAPH
 # ==========================
 
 def create_supervisor_graph():
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("supervisor", supervisor_node)
+    workflow.add_node("quick_respond", RunnableLambda(quick_respond_node, afunc=aquick_respond_node))
+    workflow.add_node("cache_lookup", RunnableLambda(cache_lookup_node, afunc=acache_lookup_node))
+    workflow.add_node("compact", RunnableLambda(compact_node, afunc=acompact_node))
+    workflow.add_node("supervisor", RunnableLambda(supervisor_node, afunc=asupervisor_node))
     workflow.add_node("research_agent", research_node)
     workflow.add_node("finance_agent", finance_node)
     workflow.add_node("travel_agent", travel_node)
@@ -300,15 +824,34 @@ def create_supervisor_graph():
     workflow.add_node("job_agent", job_node)
     workflow.add_node("memory_agent", memory_node)
     workflow.add_node("recipe_agent", recipe_node)
-    workflow.add_node("respond", respond_node)
+    workflow.add_node("respond", RunnableLambda(respond_node, afunc=arespond_node))
+    workflow.add_node("direct", RunnableLambda(direct_node, afunc=adirect_node))
+    workflow.add_node("merge", RunnableLambda(merge_node, afunc=amerge_node))
     
-    # Add edges: Start -> Supervisor
-    workflow.add_edge(START, "supervisor")
+    # Add edges: Start -> (small talk fast path | Response cache -> History compaction -> Supervisor)
+    workflow.add_conditional_edges(
+        START,
+        preroute,
+        {
+            "quick_respond": "quick_respond",
+            "cache_lookup": "cache_lookup",
+        },
+    )
+    workflow.add_edge("quick_respond", END)
+    workflow.add_conditional_edges(
+        "cache_lookup",
+        lambda x: x["next"],
+        {
+            "compact": "compact",
+            "FINISH": END,  # Cache hit
+        },
+    )
+    workflow.add_edge("compact", "supervisor")
     
     # Add conditional edges from supervisor to agents
     workflow.add_conditional_edges(
         "supervisor",
-        lambda x: x["next"],
+        route_from_supervisor,
         {
             "research_agent": "research_agent",
             "finance_agent": "finance_agent",
@@ -319,10 +862,21 @@ def create_supervisor_graph():
             "memory_agent": "memory_agent",
             "recipe_agent": "recipe_agent",
             "respond": "respond",
+            "direct": "direct",
             "FINISH": END,
         },
     )
     
+    # Direct dispatch finishes the turn, or sends a failed lookup back for normal routing
+    workflow.add_conditional_edges(
+        "direct",
+        lambda x: x.get("next", "FINISH"),
+        {
+            "FINISH": END,
+            "supervisor": "supervisor",
+        },
+    )
+    
     # After each agent completes, check if they want to finish or continue
     for agent_name in ["research_agent", "finance_agent", "travel_agent", "database_agent", "shopping_agent", "job_agent", "memory_agent", "recipe_agent", "respond"]:
         workflow.add_conditional_edges(
@@ -331,16 +885,19 @@ def create_supervisor_graph():
             {
                 "FINISH": END,
                 "supervisor": "supervisor",
+                "fanout": "merge",  # Fan-out branches all join at the merge node
             },
         )
     
+    workflow.add_edge("merge", END)
+    
     return workflow
 
 # ==========================
-# 8. COMPILE THE GRAPH
+# 12. COMPILE THE GRAPH
 # ==========================
 
-memory = InMemorySaver()
+memory = create_checkpointer()
 workflow = create_supervisor_graph()
 agent = workflow.compile(checkpointer=memory)
 
@@ -349,5 +906,35 @@ agent_config = {
     "configurable": {
         "thread_id": "samantha"
     },
-    "user_id": "samantha"  # Default user ID for memory management
-}
\ No newline at end of file
+    "user_id": "samantha",  # Default user ID for memory management
+    # Per-node / LLM / tool spans (see services/tracing.py)
+    "callbacks": [trace_handler] if tracer.enabled else [],
+}
+
+
+def drop_session_checkpoints(thread_id: str):
+    """In-memory checkpoints die with the session; SQLite threads expire on their own TTL."""
+    if CHECKPOINTER == "memory":
+        memory.delete_thread(thread_id)
+
+
+def checkpointed_user(thread_id: str):
+    """User id saved in the thread's latest checkpoint, or None for a new thread."""
+    saved = memory.get_tuple({"configurable": {"thread_id": thread_id}})
+    if saved is None:
+        return None
+    return saved.checkpoint.get("channel_values", {}).get("user_id")
+
+
+# Per-request configs for multi-session callers (backend, Streamlit) - never mutate agent_config
+session_manager = SessionManager(
+    callbacks=agent_config["callbacks"],
+    on_evict=drop_session_checkpoints,
+    owner_lookup=checkpointed_user,
+)
+
+# Optional background warm-up so the first real request doesn't pay for it
+if os.getenv("AGENT_WARMUP", "false").lower() == "true":
+    threading.Thread(target=specialist_registry.warm_up, name="agent-warmup", daemon=True).start()
+
+logger.info(f"⚡ Startup: agent graph ready in {time.perf_counter() - _import_started:.2f}s (specialists load on first use)")
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Offline benchmark - runs every tool and the full graph against a recorded
+cassette (see services/cassette.py) and reports latency percentiles and
+throughput.
+
+    python -m scripts.benchmark --record                   # capture once with live keys
+    python -m scripts.benchmark                            # replay, no network needed
+    python -m scripts.benchmark --latency 0 --iterations 20 --concurrency 8
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# ==========================
+# BENCHMARK CASES
+# ==========================
+# Fixed future date so travel searches hit the same recorded requests on every replay
+TRAVEL_DATE = os.getenv("BENCHMARK_TRAVEL_DATE", "2027-03-01")
+TRAVEL_RETURN_DATE = os.getenv("BENCHMARK_TRAVEL_RETURN_DATE", "2027-03-05")
+
+# (module, tool attribute, arguments)
+TOOL_CASES = [
+    ("tools.tavily_tool", "tavily_tool", {"query": "latest developments in renewable energy"}),
+    ("tools.stock_tools", "get_stock_price", {"ticker": "AAPL"}),
+    ("tools.stock_tools", "get_stock_prices", {"tickers": ["AAPL", "MSFT", "NVDA"]}),
+    ("tools.stock_tools", "get_company_info", {"ticker": "TSLA"}),
+    ("tools.weather_tool", "get_weather", {"city": "Hyderabad"}),
+    ("tools.weather_tool", "get_weather_multi", {"cities": ["Goa", "Mumbai", "Delhi"]}),
+    ("tools.flight_tool", "search_flights", {"origin": "HYD", "destination": "DEL", "departure_date": TRAVEL_DATE}),
+    ("tools.flight_tool", "search_flights_range", {"origin": "HYD", "destination": "BOM", "start_date": TRAVEL_DATE, "days": 5}),
+    ("tools.hotel_tool", "search_hotels", {"location": "Goa", "check_in": TRAVEL_DATE, "check_out": TRAVEL_RETURN_DATE}),
+    ("tools.recipe_tool", "search_recipes", {"query": "paneer butter masala"}),
+    ("tools.shop_tool", "shopping_search", {"query": "wireless earbuds", "num_results": 5}),
+    ("tools.job_search_tool", "job_search", {"query": "python developer", "location": "Bangalore, India"}),
+    ("tools.database_tool", "database_search", {"query": "project overview"}),
+    ("tools.memory_tool", "search_memories", {"query": "where did I study"}),
+]
+
+GRAPH_QUERIES = [
+    "Hi Samantha, how are you?",
+    "What's the weather in Goa?",
+    "What is the stock price of Apple?",
+    "Compare AAPL, MSFT and NVDA",
+    f"Find flights from HYD to DEL on {TRAVEL_DATE}",
+    "Give me a recipe for paneer butter masala",
+    "What are the latest developments in AI?",
+    "What's the weather in Goa and the stock price of Apple?",
+    "Find python developer jobs in Bangalore",
+]
+
+# Placeholder keys so tools and SDK clients start up during an offline replay
+PROVIDER_KEYS = [
+    "SERPAPI_API_KEY", "SERPER_API_KEY", "TAVILY_API_KEY", "OPENWEATHERMAP_API_KEY",
+    "MEM0_API_KEY", "CEREBRAS_API_KEY",
+]
+
+
+def configure(args):
+    """Set the environment before any app module reads its configuration at import time."""
+    os.environ["CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["CASSETTE_NAME"] = args.cassette
+    if args.latency is not None:
+        os.environ["CASSETTE_LATENCY"] = args.latency
+    if not args.record:
+        for key in PROVIDER_KEYS:
+            os.environ.setdefault(key, "replay")
+    if not args.rate_limits:
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if not args.warm:
+        # Every iteration should reach the (recorded) provider, not an application cache
+        scratch = tempfile.mkdtemp(prefix="samantha-bench-")
+        os.environ.setdefault("TOOL_CACHE_ENABLED", "false")
+        os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+        os.environ.setdefault("STOCK_QUOTE_TTL", "0")
+        os.environ.setdefault("WEATHER_OBSERVATION_TTL", "0")
+        os.environ.setdefault("JOBS_CACHE_TTL", "0")
+        os.environ.setdefault("WEATHER_GEOCODE_FILE", os.path.join(scratch, "weather_geocode.json"))
+        os.environ.setdefault("STOCK_FUNDAMENTALS_FILE", os.path.join(scratch, "stock_fundamentals.json"))
+
+# ==========================
+# RUNNER
+# ==========================
+
+def is_error(result) -> bool:
+    if isinstance(result, dict):
+        return bool(result.get("error"))
+    return not result or str(result).startswith(("Error", "❌", "No "))
+
+
+def run_cases(cases: List[Tuple[str, Callable]], iterations: int, concurrency: int) -> Dict:
+    """Run every case `iterations` times on `concurrency` threads and summarise latencies."""
+    timings: Dict[str, List[float]] = {name: [] for name, _ in cases}
+    errors: Dict[str, List[str]] = {name: [] for name, _ in cases}
+
+    def timed(name: str, call: Callable):
+        start = time.perf_counter()
+        try:
+            result = call()
+            if is_error(result):
+                errors[name].append(str(result)[:120])
+        except Exception as e:
+            errors[name].append(f"{type(e).__name__}: {e}"[:120])
+        timings[name].append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        for _ in range(iterations):
+            for name, call in cases:
+                pool.submit(timed, name, call)
+    wall = time.perf_counter() - wall_start
+
+    summary = {}
+    for name, values in timings.items():
+        latencies = np.array(values) * 1000
+        summary[name] = {
+            "runs": len(values),
+            "errors": len(errors[name]),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+            "max_ms": round(float(latencies.max()), 1),
+            "first_error": errors[name][0] if errors[name] else None,
+        }
+    total = sum(len(values) for values in timings.values())
+    return {"cases": summary, "wall_s": round(wall, 3), "throughput_per_s": round(total / wall, 2) if wall else 0.0}
+
+
+def tool_cases() -> List[Tuple[str, Callable]]:
+    cases = []
+    for module, attr, tool_args in TOOL_CASES:
+        tool = getattr(importlib.import_module(module), attr)
+        cases.append((tool.name, lambda tool=tool, tool_args=tool_args: tool.invoke(tool_args)))
+    return cases
+
+
+def graph_cases() -> List[Tuple[str, Callable]]:
+    from scripts.agent import agent, session_manager
+
+    def ask(query: str):
+        # A fresh session per run so earlier turns never change the prompt
+        config, user_id = session_manager.open(f"bench-{uuid.uuid4().hex}")
+        result = agent.invoke({"messages": [{"role": "user", "content": query}], "user_id": user_id}, config=config)
+        return result["messages"][-1].content
+
+    return [(query, lambda query=query: ask(query)) for query in GRAPH_QUERIES]
+
+
+def print_report(title: str, report: Dict):
+    print(f"\n{title}  ({report['wall_s']}s wall, {report['throughput_per_s']} calls/s)")
+    print(f"{'case':<58} {'runs':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, row in report["cases"].items():
+        print(f"{name[:58]:<58} {row['runs']:>5} {row['errors']:>4} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['max_ms']:>9}")
+        if row["first_error"]:
+            print(f"    ↳ {row['first_error']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark tools and the agent graph against recorded provider responses.")
+    parser.add_argument("--cassette", default=os.getenv("CASSETTE_NAME", "benchmark"), help="Cassette name under CASSETTE_DIR")
+    parser.add_argument("--record", action="store_true", help="Call the live providers and record their responses")
+    parser.add_argument("--latency", help='Replay delay: "recorded" or milliseconds per response')
+    parser.add_argument("--iterations", type=int, default=5, help="Runs per case (forced to 1 when recording)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Cases run in parallel (forced to 1 when recording)")
+    parser.add_argument("--only", choices=["tools", "graph"], help="Run just the tool or the graph benchmark")
+    parser.add_argument("--warm", action="store_true", help="Keep application caches enabled between runs")
+    parser.add_argument("--rate-limits", action="store_true", help="Apply the provider rate limits during the run")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        args.iterations, args.concurrency = 1, 1
+    configure(args)
+
+    from services.cassette import cassette
+
+    results = {"cassette": args.cassette, "mode": cassette.mode, "iterations": args.iterations, "concurrency": args.concurrency}
+    if args.only != "graph":
+        results["tools"] = run_cases(tool_cases(), args.iterations, args.concurrency)
+        print_report("Tools", results["tools"])
+    if args.only != "tools":
+        results["graph"] = run_cases(graph_cases(), args.iterations, args.concurrency)
+        print_report("Graph", results["graph"])
+    results["cassette_stats"] = cassette.stats()
+    print(f"\nCassette: {json.dumps(results['cassette_stats'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if cassette.misses else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
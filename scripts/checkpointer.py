@@ -0,0 +1,204 @@
+"""
+Persistent LangGraph checkpointer - SQLite in WAL mode with per-thread
+history caps, idle-thread eviction and periodic compaction.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from loguru import logger
+
+# ==========================
+# CHECKPOINTER CONFIGURATION
+# ==========================
+CHECKPOINTER = os.getenv("CHECKPOINTER", "sqlite").lower()  # "sqlite" or "memory"
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+# Checkpoints kept per thread - older ones are pruned on every write
+CHECKPOINT_MAX_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))
+# Threads untouched for this many seconds are deleted during compaction
+CHECKPOINT_IDLE_TTL = int(os.getenv("CHECKPOINT_IDLE_TTL", str(7 * 24 * 3600)))
+# Seconds between compaction passes
+CHECKPOINT_COMPACT_INTERVAL = int(os.getenv("CHECKPOINT_COMPACT_INTERVAL", "600"))
+
+
+class BoundedSqliteSaver(SqliteSaver):
+    """SqliteSaver that keeps the database bounded and can be driven from async graphs.
+
+    The per-thread cap applies to the root namespace; specialist subgraph
+    namespaces are dropped once the root checkpoint they ran under is pruned.
+
+    The stock SqliteSaver has no async methods, so the async API here runs
+    the sync implementation in a worker thread - the connection is shared
+    behind SqliteSaver's lock, and WAL mode lets several uvicorn workers use
+    the same file concurrently.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        max_checkpoints_per_thread: int = CHECKPOINT_MAX_PER_THREAD,
+        idle_ttl: int = CHECKPOINT_IDLE_TTL,
+        compact_interval: int = CHECKPOINT_COMPACT_INTERVAL,
+    ):
+        super().__init__(conn)
+        self.max_checkpoints_per_thread = max(2, max_checkpoints_per_thread)
+        self.idle_ttl = idle_ttl
+        self.compact_interval = compact_interval
+        self._last_compaction = time.monotonic()
+        self._compaction_lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, path: str, **kwargs) -> "BoundedSqliteSaver":
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA busy_timeout=30000;")
+        saver = cls(conn, **kwargs)
+        saver.setup()
+        return saver
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        # No lock here - SqliteSaver.cursor() calls setup() while already holding it
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity ("
+            "thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    # ---- bounding ----
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str):
+        with self.cursor() as cur:
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?)",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.max_checkpoints_per_thread),
+            )
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+            )
+            if not checkpoint_ns:
+                self._prune_subgraphs(cur, thread_id)
+            cur.execute(
+                "INSERT INTO thread_activity (thread_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (thread_id, time.time()),
+            )
+
+    @staticmethod
+    def _prune_subgraphs(cur, thread_id: str):
+        """Drop specialist (subgraph) namespaces whose parent checkpoint has been pruned.
+
+        Each specialist run writes under a fresh "<agent>:<task_id>" namespace.
+        Checkpoint ids are time-ordered, so a namespace whose newest checkpoint
+        predates the oldest kept root checkpoint belongs to a pruned turn.
+        """
+        cur.execute(
+            "SELECT MIN(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''",
+            (thread_id,),
+        )
+        (oldest_kept,) = cur.fetchone()
+        if oldest_kept is None:
+            return
+        cur.execute(
+            "SELECT checkpoint_ns FROM checkpoints WHERE thread_id = ? AND checkpoint_ns != '' "
+            "GROUP BY checkpoint_ns HAVING MAX(checkpoint_id) < ?",
+            (thread_id, oldest_kept),
+        )
+        stale = [(thread_id, row[0]) for row in cur.fetchall()]
+        if stale:
+            cur.executemany("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", stale)
+            cur.executemany("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ?", stale)
+
+    def evict_idle_threads(self) -> int:
+        """Delete threads that have not been written to within idle_ttl."""
+        cutoff = time.time() - self.idle_ttl
+        with self.cursor(transaction=False) as cur:
+            cur.execute("SELECT thread_id FROM thread_activity WHERE updated_at < ?", (cutoff,))
+            idle_threads = [row[0] for row in cur.fetchall()]
+
+        for thread_id in idle_threads:
+            self.delete_thread(thread_id)
+        return len(idle_threads)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+
+    def compact(self):
+        """Evict idle threads and fold the WAL back into the main database file."""
+        evicted = self.evict_idle_threads()
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+            self.conn.execute("PRAGMA optimize;")
+        logger.info(f"Checkpoint compaction done ({evicted} idle threads evicted)")
+
+    def _maybe_compact(self):
+        if time.monotonic() - self._last_compaction < self.compact_interval:
+            return
+        if not self._compaction_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_compaction = time.monotonic()
+            self.compact()
+        except Exception as e:
+            logger.error(f"Checkpoint compaction failed: {e}")
+        finally:
+            self._compaction_lock.release()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        configurable = next_config["configurable"]
+        self._prune_thread(str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""))
+        self._maybe_compact()
+        return next_config
+
+    # ---- async API (thread offloaded) ----
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config,
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before=None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = ""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer():
+    """Build the checkpointer selected by CHECKPOINTER."""
+    if CHECKPOINTER == "memory":
+        logger.info("Using in-memory checkpointer")
+        return InMemorySaver()
+
+    logger.info(f"Using SQLite checkpointer at {CHECKPOINT_DB}")
+    return BoundedSqliteSaver.from_path(CHECKPOINT_DB)
@@ -0,0 +1,199 @@
+"""
+Direct tool dispatch - extracts the tool and its arguments for simple stock,
+weather and recipe lookups so they skip the specialist's ReAct loop.
+"""
+import os
+import re
+from typing import Dict, Optional
+
+from tools.output import PARTIAL_FAILURE_HEADER
+
+# ==========================
+# DISPATCH CONFIGURATION
+# ==========================
+DIRECT_DISPATCH_ENABLED = os.getenv("DIRECT_DISPATCH_ENABLED", "true").lower() == "true"
+# "template" returns the tool output as the reply, "llm" phrases it with one short LLM call
+DIRECT_DISPATCH_RENDER = os.getenv("DIRECT_DISPATCH_RENDER", "template").lower()
+# Longer messages usually carry extra constraints the specialist should reason about
+DIRECT_DISPATCH_MAX_WORDS = int(os.getenv("DIRECT_DISPATCH_MAX_WORDS", "10"))
+
+# Tool location per dispatchable tool - same (module, attr) form as AGENT_SPECS
+DIRECT_TOOLS = {
+    "get_stock_price": ("finance_agent", "tools.stock_tools", "get_stock_price"),
+    "get_stock_prices": ("finance_agent", "tools.stock_tools", "get_stock_prices"),
+    "get_company_info": ("finance_agent", "tools.stock_tools", "get_company_info"),
+    "get_weather": ("travel_agent", "tools.weather_tool", "get_weather"),
+    "get_weather_multi": ("travel_agent", "tools.weather_tool", "get_weather_multi"),
+    "search_recipes": ("recipe_agent", "tools.recipe_tool", "search_recipes"),
+}
+
+# Common company names -> ticker; anything else must be given as a ticker
+COMPANY_TICKERS = {
+    "apple": "AAPL",
+    "microsoft": "MSFT",
+    "google": "GOOGL",
+    "alphabet": "GOOGL",
+    "amazon": "AMZN",
+    "tesla": "TSLA",
+    "nvidia": "NVDA",
+    "meta": "META",
+    "facebook": "META",
+    "netflix": "NFLX",
+    "intel": "INTC",
+    "amd": "AMD",
+    "ibm": "IBM",
+    "oracle": "ORCL",
+    "reliance": "RELIANCE.NS",
+    "tcs": "TCS.NS",
+    "infosys": "INFY",
+    "wipro": "WIT",
+}
+# Bare capitals are only read as tickers next to one of these words ("compare AI and ML" is not about stocks)
+_MARKET_WORDS = r"\b(stocks?|shares?|prices?|tickers?|quotes?)\b"
+# Capitalised words that are far more often acronyms than tickers
+_NOT_TICKERS = {
+    "AI", "ML", "AT", "T", "A", "I", "IT", "US", "UK", "EU", "UN", "TV", "PC", "OK", "CEO", "CFO",
+    "IPO", "ETF", "GDP", "API", "USD", "INR", "EUR", "NSE", "BSE", "NYSE",
+}
+
+_STOCK_PATTERNS = [
+    r"(?:what is |what's |whats )?(?:the )?(?:current |latest )?(?:stock|share) price (?:of|for) (?P<name>[\w.&' ]+?)(?: stock| shares)?",
+    r"(?:what is |what's |whats )?(?:the )?(?:current |latest )?price (?:of|for) (?P<name>[\w.&' ]+?) (?:stock|shares)",
+    r"(?:what is |what's |whats )?(?P<name>[\w.&' ]+?)(?:'s)? (?:current |latest )?(?:stock|share) price",
+    r"how is (?P<name>[\w.&' ]+?) stock doing(?: today)?",
+]
+# "compare AAPL, MSFT and NVDA", "stock prices of apple and tesla"
+_MULTI_STOCK_PATTERN = r"(?:compare|(?:what are )?(?:the )?(?:current )?(?:stock |share )?prices (?:of|for))(?: the)? (?P<names>[\w.&' ]+?(?:(?:,| and| vs| versus|, and) [\w.&' ]+?)+)(?: stocks?| shares| stock prices)?"
+_COMPANY_PATTERNS = [
+    r"(?:give |get |show )?(?:me )?(?P<name>[\w.&' ]+?)(?:'s)? company (?:info|information|details)",
+    r"(?:give |get |show )?(?:me )?company (?:info|information|details) (?:of|for|about) (?P<name>[\w.&' ]+)",
+]
+# Current conditions only - forecasts ("will it rain tomorrow") need the specialist.
+# "temperature for ..." is usually cooking, so temperature takes in/at only.
+_WEATHER_PATTERNS = [
+    r"(?:what is |what's |whats |how is |how's )?(?:the )?(?:current |today's )?weather (?:like )?(?:at|in|for) (?P<city>[a-z .'-]+?)(?: today| now| right now)?",
+    r"(?:what is |what's |whats )?(?:the )?(?:current )?temperature (?:at|in) (?P<city>[a-z .'-]+?)(?: today| now| right now)?",
+]
+# "the oven", "my room" - not a place the weather tool can look up
+_NOT_A_CITY = r"(?:the|a|an|my|your|our|this|that|celsius|fahrenheit)\b.*"
+# A captured "city" holding any of these is a forecast, a choice or a second question, not a place
+_NOT_A_PLACE_WORDS = {
+    # time - forecasts need the specialist
+    "tomorrow", "tonight", "yesterday", "next", "week", "weekend", "weekdays", "month", "year", "morning",
+    "afternoon", "evening", "night", "later", "summer", "winter", "spring", "autumn", "monsoon",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    # choices and follow-on questions
+    "or", "what", "how", "where", "when", "why", "which", "who", "should", "would", "could", "can",
+    "will", "is", "are", "do", "does", "i", "we", "you", "it", "to", "get", "go", "pack", "wear", "there",
+}
+_MAX_PLACE_WORDS = 3
+# "weather in goa and mumbai", "what's the weather in delhi, pune and goa"
+_MULTI_WEATHER_PATTERN = r"(?:what is |what's |whats |how is |how's )?(?:the )?(?:current |today's )?weather (?:like )?(?:at|in|for) (?P<cities>[a-z .'-]+?(?:(?:,| and|, and) [a-z .'-]+?)+)(?: today| now| right now)?"
+_RECIPE_PATTERNS = [
+    r"(?:give me |show me |find )?(?:a )?recipes? (?:for|of) (?P<dish>[\w '-]+)",
+    r"how (?:to|do i|can i|do you) (?:make|cook|bake|prepare) (?:a |an |some )?(?P<dish>[\w '-]+)",
+]
+# "how to make ..." is only a recipe request when the object is food ("how to make money online" is not)
+_FOOD_WORDS = {
+    "biryani", "bread", "brownie", "brownies", "burger", "butter", "cake", "cakes", "chai", "chicken",
+    "chutney", "coffee", "cookie", "cookies", "curry", "dal", "dosa", "egg", "eggs", "fish", "fries",
+    "halwa", "idli", "khichdi", "lasagna", "masala", "muffin", "muffins", "noodles", "omelette",
+    "pancake", "pancakes", "paneer", "paratha", "pasta", "pie", "pizza", "pulao", "rice", "roti",
+    "salad", "samosa", "sandwich", "sauce", "smoothie", "soup", "stew", "tea", "tikka", "mutton",
+}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[?!,]", " ", text.strip().lower()).split()).rstrip(".")
+
+
+def _ticker(name: str, original: str) -> Optional[str]:
+    name = name.strip()
+    if name in COMPANY_TICKERS:
+        return COMPANY_TICKERS[name]
+    # Bare tickers are only trusted when the user typed them in capitals ("TSLA") while asking about the market
+    if not re.search(_MARKET_WORDS, original, re.IGNORECASE):
+        return None
+    match = re.search(rf"\b({re.escape(name)})\b", original, re.IGNORECASE)
+    if match and re.fullmatch(r"[A-Z]{1,5}(\.[A-Z]{1,3})?", match.group(1)) and match.group(1) not in _NOT_TICKERS:
+        return match.group(1)
+    return None
+
+
+def _is_place(city: str) -> bool:
+    words = city.split()
+    return (
+        0 < len(words) <= _MAX_PLACE_WORDS
+        and not re.fullmatch(_NOT_A_CITY, city)
+        and not _NOT_A_PLACE_WORDS.intersection(words)
+    )
+
+
+def _match(patterns, text: str, group: str) -> Optional[str]:
+    for pattern in patterns:
+        match = re.fullmatch(pattern, text)
+        if match:
+            return match.group(group).strip()
+    return None
+
+
+def plan_direct_call(query: str) -> Optional[Dict]:
+    """Return {"agent", "tool", "args"} for a simple single-intent lookup, else None."""
+    if not DIRECT_DISPATCH_ENABLED or not query:
+        return None
+    text = _normalize(query)
+    if not text:
+        return None
+
+    # Several tickers in one request - one batched quote lookup (commas matter here)
+    listed = " ".join(re.sub(r"[?!]", " ", query.lower()).replace(",", ", ").split()).rstrip(".")
+    match = re.fullmatch(_MULTI_STOCK_PATTERN, listed)
+    if match:
+        names = [n for n in re.split(r",|\band\b|\bvs\b|\bversus\b", match.group("names")) if n.strip()]
+        tickers = [_ticker(n, query) for n in names]
+        if len(tickers) > 1 and all(tickers):
+            return _call("get_stock_prices", {"tickers": tickers})
+        return None
+
+    # Mixed requests ("weather in goa and the stock price of apple") are left to fan-out
+    mixed = re.search(r"\b(stock|share|price|flight|hotel|recipe|job)s?\b", listed)
+    match = None if mixed or len(text.split()) > DIRECT_DISPATCH_MAX_WORDS else re.fullmatch(_MULTI_WEATHER_PATTERN, listed)
+    if match:
+        cities = [c.strip() for c in re.split(r",|\band\b", match.group("cities")) if c.strip()]
+        # "weather in goa and what should i pack" - the second half is another request
+        if all(_is_place(city) for city in cities):
+            return _call("get_weather_multi", {"cities": cities})
+        return None
+
+    # Compound or long requests go through the supervisor (and possibly fan-out)
+    if len(text.split()) > DIRECT_DISPATCH_MAX_WORDS or re.search(r"\b(and|also|then|compare|vs)\b", text):
+        return None
+
+    name = _match(_STOCK_PATTERNS, text, "name")
+    if name:
+        ticker = _ticker(name, query)
+        return _call("get_stock_price", {"ticker": ticker}) if ticker else None
+
+    name = _match(_COMPANY_PATTERNS, text, "name")
+    if name:
+        ticker = _ticker(name, query)
+        return _call("get_company_info", {"ticker": ticker}) if ticker else None
+
+    city = _match(_WEATHER_PATTERNS, text, "city")
+    if city and _is_place(city):
+        return _call("get_weather", {"city": city})
+
+    dish = _match(_RECIPE_PATTERNS, text, "dish")
+    if dish and ("recipe" in text or _FOOD_WORDS.intersection(dish.split())):
+        return _call("search_recipes", {"query": dish})
+
+    return None
+
+
+def _call(tool_name: str, args: Dict) -> Dict:
+    return {"agent": DIRECT_TOOLS[tool_name][0], "tool": tool_name, "args": args}
+
+
+def is_tool_error(result: str) -> bool:
+    """Tools report failures as text - those turns, and partial results, fall back to the specialist."""
+    return not result or result.startswith(("Error", "❌", "No ")) or PARTIAL_FAILURE_HEADER in result
@@ -0,0 +1,83 @@
+"""
+Conversation history compaction - keeps the last turns verbatim, folds older
+turns into a running summary and trims each node's prompt to a token budget.
+"""
+import os
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, convert_to_messages
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+
+# ==========================
+# HISTORY CONFIGURATION
+# ==========================
+# Messages kept verbatim after compaction (a turn is a user + assistant message)
+HISTORY_KEEP_MESSAGES = int(os.getenv("HISTORY_KEEP_MESSAGES", "12"))
+# Extra messages allowed to pile up before they are folded into the summary
+HISTORY_SUMMARY_BATCH = int(os.getenv("HISTORY_SUMMARY_BATCH", "6"))
+# Default prompt budget per node, in approximate tokens
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+# Per-node overrides, e.g. HISTORY_TOKEN_BUDGET_SUPERVISOR=1000
+NODE_TOKEN_BUDGET_DEFAULTS = {"supervisor": 1000}
+
+SUMMARY_PROMPT = """Summarize the conversation below for an assistant that will continue it.
+Keep names, preferences, decisions, dates, places and open questions. Drop greetings and filler.
+Write at most 150 words in plain sentences."""
+
+
+def token_budget(node: str) -> int:
+    """Prompt budget for a node (HISTORY_TOKEN_BUDGET_<NODE> overrides the default)."""
+    override = os.getenv(f"HISTORY_TOKEN_BUDGET_{node.upper()}")
+    if override:
+        return int(override)
+    return NODE_TOKEN_BUDGET_DEFAULTS.get(node, HISTORY_TOKEN_BUDGET)
+
+
+def plan_compaction(
+    messages: list, summarized_count: int
+) -> Optional[Tuple[List[BaseMessage], List[BaseMessage], int]]:
+    """Decide which messages to fold into the summary.
+
+    ``summarized_count`` is how many leading messages of the client's history
+    are already part of the summary. Returns ``(to_fold, recent, new_count)``
+    or None when the history is still short enough.
+    """
+    messages = convert_to_messages(messages)
+    if len(messages) - summarized_count <= HISTORY_KEEP_MESSAGES + HISTORY_SUMMARY_BATCH:
+        return None
+
+    # Never start the verbatim window in the middle of an exchange
+    cut = len(messages) - HISTORY_KEEP_MESSAGES
+    while cut < len(messages) - 1 and not isinstance(messages[cut], HumanMessage):
+        cut += 1
+
+    return messages[summarized_count:cut], messages[cut:], cut
+
+
+def summary_request(summary: str, to_fold: List[BaseMessage]) -> List[BaseMessage]:
+    """Build the LLM prompt that folds messages into the running summary."""
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in to_fold if isinstance(m.content, str) and m.content)
+    if summary:
+        transcript = f"Summary so far: {summary}\n\n{transcript}"
+    return [SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=transcript)]
+
+
+def with_history_budget(messages: list, summary: str, node: str) -> List[BaseMessage]:
+    """Return the running summary plus as many recent messages as fit the node's budget."""
+    context: List[BaseMessage] = []
+    if summary:
+        context.append(SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+
+    messages = convert_to_messages(messages)
+    trimmed = trim_messages(
+        messages,
+        max_tokens=token_budget(node),
+        strategy="last",
+        token_counter=count_tokens_approximately,
+        start_on="human",
+        allow_partial=False,
+    )
+    if not trimmed and messages:
+        # The latest message alone is over budget - still send it
+        trimmed = messages[-1:]
+    return context + trimmed
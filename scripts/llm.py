@@ -0,0 +1,363 @@
+"""
+Hedged, deadline-aware chat model - wraps the Cerebras model with per-node
+deadlines, a hedged second request after a p95-based delay (the loser is
+cancelled) and an optional fallback model (Groq or OpenAI).
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+from loguru import logger
+
+from services.cassette import cassette
+
+# ==========================
+# LLM CALL CONFIGURATION
+# ==========================
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+# A sync hedge runs on a worker thread that can't be cancelled: the losing request still
+# completes (and is billed) and holds a pool worker until it does. Off unless opted in;
+# the async path cancels the loser and always hedges when LLM_HEDGE_ENABLED is set
+LLM_HEDGE_SYNC = os.getenv("LLM_HEDGE_SYNC", "false").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Hedge delay used until a node has enough latency samples
+LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "1.5"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.3"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Deadline (seconds) for a full response, or for the first token when streaming.
+# Only enforced when LLM_FALLBACK is set - without a fallback, missing it would just fail the turn
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "20"))
+NODE_DEADLINE_DEFAULTS = {
+    "supervisor": 4.0,
+    "quick_respond": 3.0,
+    "compact": 10.0,
+    "direct": 8.0,
+    "respond": 12.0,
+    "merge": 15.0,
+}
+# "groq", "openai" or empty to disable the fallback model
+LLM_FALLBACK = os.getenv("LLM_FALLBACK", "").lower()
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "")
+FALLBACK_DEFAULT_MODELS = {
+    "groq": "llama-3.3-70b-versatile",
+    "openai": "gpt-4o-mini",
+}
+
+
+def node_deadline(node: Optional[str]) -> float:
+    """Deadline for LLM calls made by a graph node - LLM_DEADLINE_<NODE> overrides the default."""
+    if not node:
+        return LLM_DEADLINE
+    override = os.getenv(f"LLM_DEADLINE_{node.upper()}")
+    if override:
+        return float(override)
+    return NODE_DEADLINE_DEFAULTS.get(node, LLM_DEADLINE)
+
+
+class LatencyTracker:
+    """Recent call latencies per (node, mode) - drives the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, key: str) -> float:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_DEFAULT_DELAY
+        return max(LLM_HEDGE_MIN_DELAY, float(np.percentile(samples, LLM_HEDGE_PERCENTILE)))
+
+    def count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = {
+                key: {
+                    "p50": round(float(np.percentile(samples, 50)), 3),
+                    "p95": round(float(np.percentile(samples, 95)), 3),
+                    "samples": len(samples),
+                }
+                for key, samples in self._samples.items() if samples
+            }
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "timeouts": self.timeouts,
+                "fallbacks": self.fallbacks,
+                "latency": latencies,
+            }
+
+
+llm_latency = LatencyTracker()
+
+# Sync calls run here so the deadline can be enforced; a sync hedge (LLM_HEDGE_SYNC) adds a second thread
+llm_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_MAX_WORKERS", "16")), thread_name_prefix="llm")
+
+
+def build_fallback_model(max_tokens: int = 512, temperature: float = 0.3) -> Optional[BaseChatModel]:
+    """Create the LLM_FALLBACK model (imported lazily), or None when disabled/unavailable."""
+    if not LLM_FALLBACK:
+        return None
+    model_name = LLM_FALLBACK_MODEL or FALLBACK_DEFAULT_MODELS.get(LLM_FALLBACK, "")
+    try:
+        if LLM_FALLBACK == "groq":
+            from langchain_groq import ChatGroq
+            return ChatGroq(model=model_name, max_tokens=max_tokens, temperature=temperature,
+                            timeout=LLM_REQUEST_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+                            **cassette.llm_client_kwargs())
+        if LLM_FALLBACK == "openai":
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(model=model_name, max_tokens=max_tokens, temperature=temperature,
+                              timeout=LLM_REQUEST_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+                              **cassette.llm_client_kwargs())
+        logger.warning(f"Unknown LLM_FALLBACK '{LLM_FALLBACK}' - fallback disabled")
+    except Exception as e:
+        logger.error(f"Could not create {LLM_FALLBACK} fallback model: {e}")
+    return None
+
+
+def _node_from_run(run_manager) -> Optional[str]:
+    """Top-level graph node that made this call (specialists run a nested 'agent' node)."""
+    metadata = getattr(run_manager, "metadata", None) or {}
+    namespace = metadata.get("langgraph_checkpoint_ns") or ""
+    if namespace:
+        return namespace.split("|")[0].split(":")[0]
+    return metadata.get("langgraph_node")
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model wrapper adding deadlines, hedged requests and a fallback model.
+
+    Callbacks and streaming events are emitted by this wrapper, so the inner
+    models are called through their private _generate/_astream methods.
+    """
+
+    primary: BaseChatModel
+    fallback: Optional[BaseChatModel] = None
+    hedge: bool = LLM_HEDGE_ENABLED
+
+    @property
+    def _llm_type(self) -> str:
+        return f"hedged-{self.primary._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"primary": self.primary._identifying_params, "fallback": LLM_FALLBACK or None}
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        return self.primary._get_ls_params(stop=stop, **kwargs)
+
+    def bind_tools(self, tools, **kwargs):
+        # Reuse the primary's tool formatting (OpenAI format, also understood by the fallbacks)
+        return self.bind(**self.primary.bind_tools(tools, **kwargs).kwargs)
+
+    # ---- sync ----
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        node = _node_from_run(run_manager)
+        try:
+            return self._hedged_sync(
+                lambda: self.primary._generate(messages, stop=stop, **kwargs), node, "total"
+            )
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"Primary LLM failed for {node or 'call'} ({e!r}) - using {LLM_FALLBACK} fallback")
+            llm_latency.count(fallbacks=1)
+            return self.fallback._generate(messages, stop=stop, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        # Sync streaming is only used by the local UIs - no hedging, fallback before the first token
+        try:
+            chunks = self.primary._stream(messages, stop=stop, **kwargs)
+            first = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"Primary LLM stream failed ({e!r}) - using {LLM_FALLBACK} fallback")
+            llm_latency.count(fallbacks=1)
+            yield from self.fallback._stream(messages, stop=stop, **kwargs)
+            return
+        yield first
+        yield from chunks
+
+    def _deadline(self, node: Optional[str]) -> Optional[float]:
+        """The node's deadline, or None (wait for the provider) when there is no fallback to switch to."""
+        return node_deadline(node) if self.fallback is not None else None
+
+    def _should_hedge(self, delay: float, deadline: Optional[float], sync: bool = False) -> bool:
+        if sync and not LLM_HEDGE_SYNC:
+            return False
+        return self.hedge and (deadline is None or delay < deadline)
+
+    def _hedged_sync(self, call, node: Optional[str], mode: str):
+        key = f"{node or 'default'}:{mode}"
+        deadline = self._deadline(node)
+        delay = llm_latency.hedge_delay(key)
+        started = time.perf_counter()
+        llm_latency.count(calls=1)
+
+        futures = [llm_executor.submit(contextvars.copy_context().run, call)]
+        done, _ = wait(futures, timeout=delay if deadline is None else min(delay, deadline))
+        if done and futures[0].exception() is not None:
+            # A fast failure (auth, 4xx, bad request) would fail again - hedging only duplicates it
+            raise futures[0].exception()
+        if not done and self._should_hedge(delay, deadline, sync=True):
+            logger.info(f"Hedging LLM call for {key} after {time.perf_counter() - started:.2f}s")
+            llm_latency.count(hedged=1)
+            futures.append(llm_executor.submit(contextvars.copy_context().run, call))
+
+        pending, error = list(futures), None
+        while pending:
+            remaining = None if deadline is None else max(deadline - (time.perf_counter() - started), 0)
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    llm_latency.record(key, time.perf_counter() - started)
+                    if future is not futures[0]:
+                        llm_latency.count(hedge_wins=1)
+                    return future.result()
+                error = future.exception()
+
+        for loser in pending:
+            loser.cancel()
+        if error is not None and not pending:
+            raise error
+        llm_latency.count(timeouts=1)
+        raise TimeoutError(f"LLM call for {key} exceeded its {deadline:.1f}s deadline")
+
+    # ---- async ----
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        node = _node_from_run(run_manager)
+        try:
+            return await self._hedged_async(
+                lambda: self.primary._agenerate(messages, stop=stop, **kwargs), node, "total"
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"Primary LLM failed for {node or 'call'} ({e!r}) - using {LLM_FALLBACK} fallback")
+            llm_latency.count(fallbacks=1)
+            return await self.fallback._agenerate(messages, stop=stop, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        node = _node_from_run(run_manager)
+
+        async def first_chunk():
+            # Race on time-to-first-token - that's what the voice user hears
+            chunks = self.primary._astream(messages, stop=stop, **kwargs)
+            try:
+                return await chunks.__anext__(), chunks
+            except StopAsyncIteration:
+                return None, chunks
+
+        try:
+            first, chunks = await self._hedged_async(first_chunk, node, "first_token", discard=_close_stream)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            logger.warning(f"Primary LLM stream failed for {node or 'call'} ({e!r}) - using {LLM_FALLBACK} fallback")
+            llm_latency.count(fallbacks=1)
+            async for chunk in self.fallback._astream(messages, stop=stop, **kwargs):
+                yield chunk
+            return
+
+        if first is None:
+            return
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    async def _hedged_async(self, make_call, node: Optional[str], mode: str, discard=None):
+        key = f"{node or 'default'}:{mode}"
+        deadline = self._deadline(node)
+        delay = llm_latency.hedge_delay(key)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        llm_latency.count(calls=1)
+
+        tasks = [asyncio.ensure_future(make_call())]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay if deadline is None else min(delay, deadline))
+            if done and tasks[0].exception() is not None:
+                # A fast failure (auth, 4xx, bad request) would fail again - hedging only duplicates it
+                raise tasks[0].exception()
+            if not done and self._should_hedge(delay, deadline):
+                logger.info(f"Hedging LLM call for {key} after {loop.time() - started:.2f}s")
+                llm_latency.count(hedged=1)
+                tasks.append(asyncio.ensure_future(make_call()))
+
+            pending, error = list(tasks), None
+            while pending:
+                ready = [t for t in pending if t.done()]
+                if not ready:
+                    remaining = None if deadline is None else max(deadline - (loop.time() - started), 0)
+                    ready, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                    if not ready:
+                        break
+                for task in ready:
+                    pending.remove(task)
+                    if task.exception() is None:
+                        winner = task
+                        llm_latency.record(key, loop.time() - started)
+                        if task is not tasks[0]:
+                            llm_latency.count(hedge_wins=1)
+                        return task.result()
+                    error = task.exception()
+
+            if error is not None and not pending:
+                raise error
+            llm_latency.count(timeouts=1)
+            raise TimeoutError(f"LLM call for {key} exceeded its {deadline:.1f}s deadline")
+        finally:
+            # Cancel the loser (closes its HTTP request) and release any finished extra result
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif discard is not None and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+
+
+async def _close_stream(result):
+    _, chunks = result
+    await chunks.aclose()
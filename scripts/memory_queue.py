@@ -0,0 +1,123 @@
+"""
+Write-behind queue for Mem0 - keeps memory persistence off the response path.
+"""
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+from services.rate_limiter import background
+
+# ==========================
+# QUEUE CONFIGURATION
+# ==========================
+MEMORY_QUEUE_SIZE = int(os.getenv("MEMORY_QUEUE_SIZE", "256"))
+MEMORY_BATCH_SIZE = int(os.getenv("MEMORY_BATCH_SIZE", "8"))
+MEMORY_MAX_RETRIES = int(os.getenv("MEMORY_MAX_RETRIES", "3"))
+MEMORY_FLUSH_TIMEOUT = float(os.getenv("MEMORY_FLUSH_TIMEOUT", "10"))
+
+
+class MemoryWriteQueue:
+    """Buffers interactions and writes them to memory from a background thread.
+
+    Interactions for the same user that arrive together are merged into one
+    write. Failed writes are retried with exponential backoff, and the
+    buffer is bounded - when it is full new interactions are dropped rather
+    than blocking the caller.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict], str], None],
+        max_size: int = MEMORY_QUEUE_SIZE,
+        batch_size: int = MEMORY_BATCH_SIZE,
+        max_retries: int = MEMORY_MAX_RETRIES,
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max_size)
+        self._worker = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="mem0-writer", daemon=True)
+                self._worker.start()
+
+    def enqueue(self, user_id: str, messages: List[Dict]) -> bool:
+        """Queue messages for a user. Returns False when the buffer is full."""
+        try:
+            self._queue.put_nowait((user_id, messages))
+        except queue.Full:
+            logger.warning(f"Memory write queue full - dropping interaction for user {user_id}")
+            return False
+        self._ensure_worker()
+        return True
+
+    def _next_batch(self) -> List[tuple]:
+        batch = [self._queue.get(timeout=0.5)]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_with_retry(self, user_id: str, messages: List[Dict]):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.writer(messages, user_id)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Error saving interaction after {attempt} attempts: {e}")
+                    return
+                delay = 0.5 * 2 ** (attempt - 1)
+                logger.warning(f"Memory write failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _run(self):
+        # Memory writes yield provider capacity to interactive turns
+        with background():
+            self._drain()
+
+    def _drain(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                continue
+
+            # Merge interactions per user so each user costs one write
+            grouped: Dict[str, List[Dict]] = {}
+            for user_id, messages in batch:
+                grouped.setdefault(user_id, []).extend(messages)
+
+            try:
+                for user_id, messages in grouped.items():
+                    self._write_with_retry(user_id, messages)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = MEMORY_FLUSH_TIMEOUT) -> bool:
+        """Block until every queued interaction is written or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                logger.warning(f"Memory write queue flush timed out with {self._queue.unfinished_tasks} pending")
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self, timeout: float = MEMORY_FLUSH_TIMEOUT):
+        """Flush pending writes and stop the worker."""
+        if self._worker is not None and self._worker.is_alive():
+            self.flush(timeout)
+        self._stopping.set()
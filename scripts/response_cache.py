@@ -0,0 +1,158 @@
+"""
+Semantic response cache - answers repeated questions ("how do I make tiramisu?")
+from memory by matching the MiniLM embedding of the user message.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+from services.embeddings import embed_text
+
+# ==========================
+# CACHE CONFIGURATION
+# ==========================
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity needed for a hit
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+# Nodes whose answers may be cached. Not respond: its answers use the user's memories,
+# and a hit would also skip that turn's memory write
+RESPONSE_CACHE_AGENTS = [
+    a.strip() for a in os.getenv("RESPONSE_CACHE_AGENTS", "recipe_agent,database_agent").split(",") if a.strip()
+]
+# Shorter messages ("why?", "and tomorrow?") depend on context and are never cached
+RESPONSE_CACHE_MIN_WORDS = int(os.getenv("RESPONSE_CACHE_MIN_WORDS", "3"))
+
+# Words that make a message lean on the conversation so far ("tell me more about that")
+_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|that|this|those|these|they|them|their|he|she|him|her|there|then|more|again|else|also|"
+    r"another|other|same|instead|previous|last|above|earlier|why|what about|how about)\b",
+    re.IGNORECASE,
+)
+
+
+def _previous_reply(messages: list) -> str:
+    """Text of the assistant message the latest user message answers, or ""."""
+    for message in reversed(messages[:-1]):
+        role = message.get("role") if isinstance(message, dict) else getattr(message, "type", None)
+        if role in ("assistant", "ai"):
+            return message.get("content", "") if isinstance(message, dict) else message.content
+    return ""
+
+
+def _message_text(messages: list) -> str:
+    if not messages:
+        return ""
+    last = messages[-1]
+    return last.get("content", "") if isinstance(last, dict) else last.content
+
+
+def conversation_context(query: str, messages: list) -> str:
+    """"" for standalone questions; follow-ups are keyed on the reply they follow."""
+    if not _FOLLOW_UP_PATTERN.search(query):
+        return ""
+    return hashlib.sha1(_previous_reply(messages).encode()).hexdigest()
+
+
+class SemanticResponseCache:
+    """Per-user LRU of (query embedding, answer) pairs with a TTL.
+
+    Follow-up questions only match entries stored after the same assistant
+    reply, so "explain that again" never replays another conversation.
+    """
+
+    def __init__(
+        self,
+        threshold: float = RESPONSE_CACHE_THRESHOLD,
+        ttl: int = RESPONSE_CACHE_TTL,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # Embeddings computed during lookup, reused when the answer is stored
+        self._recent_vectors: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id: str, context: str, query: str) -> tuple:
+        return user_id, context, " ".join(query.lower().split())
+
+    @staticmethod
+    def cacheable(query: str) -> bool:
+        return len(query.split()) >= RESPONSE_CACHE_MIN_WORDS
+
+    def _vector(self, key: tuple, query: str) -> np.ndarray:
+        with self._lock:
+            vector = self._recent_vectors.get(key)
+        if vector is None:
+            vector = embed_text(query)
+            with self._lock:
+                self._recent_vectors[key] = vector
+                while len(self._recent_vectors) > 64:
+                    self._recent_vectors.popitem(last=False)
+        return vector
+
+    def lookup(self, user_id: str, messages: List) -> Optional[str]:
+        """Return a cached answer for a semantically equivalent latest message, if any."""
+        query = _message_text(messages)
+        if not self.cacheable(query):
+            return None
+
+        key = self._key(user_id, conversation_context(query, messages), query)
+        vector = self._vector(key, query)
+        now = time.time()
+        best_key, best_score = None, self.threshold
+
+        with self._lock:
+            for entry_key, (entry_vector, _, created_at) in list(self._entries.items()):
+                if now - created_at > self.ttl:
+                    del self._entries[entry_key]
+                    continue
+                if entry_key[:2] != key[:2]:
+                    continue
+                score = float(entry_vector @ vector)
+                if score >= best_score:
+                    best_key, best_score = entry_key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            answer = self._entries[best_key][1]
+
+        logger.info(f"Response cache hit (similarity={best_score:.2f}) for: {query[:50]}")
+        return answer
+
+    def store(self, user_id: str, messages: List, answer: str):
+        """Remember the answer to this user's latest message."""
+        query = _message_text(messages)
+        if not answer or not self.cacheable(query):
+            return
+        key = self._key(user_id, conversation_context(query, messages), query)
+        vector = self._vector(key, query)
+        with self._lock:
+            self._entries[key] = (vector, answer, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = SemanticResponseCache()
@@ -0,0 +1,154 @@
+"""
+Local intent router - scores the user message against per-agent prototype
+centroids built from the MiniLM embeddings, so unambiguous queries can be
+routed without a supervisor LLM call.
+"""
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from services.embeddings import embed_text, embed_texts
+
+# ==========================
+# ROUTER CONFIGURATION
+# ==========================
+# "llm" keeps the original supervisor-only routing, "embedding" tries the local router first
+ROUTER_MODE = os.getenv("ROUTER_MODE", "embedding").lower()
+# Minimum cosine similarity for the best agent
+ROUTER_MIN_SCORE = float(os.getenv("ROUTER_MIN_SCORE", "0.35"))
+# Minimum gap between the best and second best agent
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", "0.08"))
+# Conjunctions and lists that may join two requests ("Apple's stock price and the weather in Goa")
+COMPOUND_PATTERN = re.compile(r"\b(and|also|plus|then|as well as)\b|[,;&]", re.IGNORECASE)
+
+# Example utterances for every routable agent
+AGENT_PROTOTYPES: Dict[str, List[str]] = {
+    "research_agent": [
+        "What is the latest news about AI?",
+        "Who won the match yesterday?",
+        "Search the web for the history of the Eiffel Tower",
+        "What happened in the election today?",
+        "Tell me the current events in India",
+    ],
+    "finance_agent": [
+        "What is the stock price of Apple?",
+        "Current price of TSLA",
+        "Give Apple company information",
+        "What is the market cap of Microsoft?",
+        "How is NVIDIA stock doing today?",
+    ],
+    "travel_agent": [
+        "What is the current weather at Hyderabad?",
+        "Will it rain in Mumbai today?",
+        "What are the flights available from DEL to BOM?",
+        "Find me a flight from JFK to LAX next week",
+        "Best high rated hotels in Rajahmundry for 6 days",
+        "Book a hotel in Paris",
+    ],
+    "database_agent": [
+        "What does the uploaded document say about the warranty?",
+        "Search the manual for installation steps",
+        "Find information in my uploaded PDF",
+        "What is in the knowledge base about the company policy?",
+    ],
+    "shopping_agent": [
+        "Suggest me best Nike shoes to shop",
+        "Buy an iPhone 15 at the lowest price",
+        "Compare prices of wireless earbuds",
+        "Where can I buy a gaming laptop?",
+    ],
+    "job_agent": [
+        "Find software engineer jobs in Bangalore",
+        "Entry level physics jobs",
+        "Are there any remote data scientist openings?",
+        "Search for job postings for a product manager",
+    ],
+    "memory_agent": [
+        "What do you remember about me?",
+        "What do you know about me?",
+        "Do you remember what I studied?",
+        "What did we talk about last time?",
+    ],
+    "recipe_agent": [
+        "How to make pasta carbonara?",
+        "Recipe for cheesecake",
+        "What ingredients do I need for tiramisu?",
+        "How do I cook biryani?",
+    ],
+    "respond": [
+        "Hello",
+        "Hi, how are you?",
+        "Tell me about yourself",
+        "What can you do?",
+        "Thank you",
+        "My name is Bharath",
+    ],
+}
+
+
+class EmbeddingRouter:
+    """Routes queries to the nearest agent prototype centroid."""
+
+    def __init__(self, prototypes: Dict[str, List[str]]):
+        self.prototypes = prototypes
+        self.agents: List[str] = list(prototypes)
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _build_centroids(self) -> np.ndarray:
+        with self._lock:
+            if self._centroids is None:
+                rows = []
+                for agent_name in self.agents:
+                    centroid = embed_texts(self.prototypes[agent_name]).mean(axis=0)
+                    rows.append(centroid / np.linalg.norm(centroid))
+                self._centroids = np.vstack(rows)
+                logger.info(f"Embedding router ready with {len(self.agents)} agent centroids")
+        return self._centroids
+
+    def scores(self, query: str) -> List[Tuple[str, float]]:
+        """Return (agent, cosine similarity) pairs sorted best first."""
+        centroids = self._build_centroids()
+        similarities = centroids @ embed_text(query)
+        order = np.argsort(similarities)[::-1]
+        return [(self.agents[i], float(similarities[i])) for i in order]
+
+    def route_with_prediction(self, query: str, multi_intent: bool = False) -> Tuple[Optional[str], Optional[Tuple[str, float]]]:
+        """Return (decision, best candidate).
+
+        The decision is the agent name when it is unambiguous, otherwise None.
+        The best candidate (agent, score) is returned either way as a cheap
+        prediction of what the supervisor will pick.
+
+        With multi_intent, queries that may need several agents (a conjunction
+        or list, or a runner-up that also clears ROUTER_MIN_SCORE) are left to
+        the supervisor, which can fan out.
+        """
+        if not query.strip():
+            return None, None
+
+        ranked = self.scores(query)
+        (best, best_score), (_, second_score) = ranked[0], ranked[1]
+        margin = best_score - second_score
+
+        if multi_intent and (COMPOUND_PATTERN.search(query) or second_score >= ROUTER_MIN_SCORE):
+            logger.info(f"Embedding router deferring possible multi-agent query ({best} score={best_score:.2f}, second={second_score:.2f})")
+            return None, ranked[0]
+
+        if best_score >= ROUTER_MIN_SCORE and margin >= ROUTER_MARGIN:
+            logger.info(f"Embedding router picked {best} (score={best_score:.2f}, margin={margin:.2f})")
+            return best, ranked[0]
+
+        logger.info(f"Embedding router unsure ({best} score={best_score:.2f}, margin={margin:.2f})")
+        return None, ranked[0]
+
+    def route(self, query: str) -> Optional[str]:
+        """Return the agent name when the decision is unambiguous, otherwise None."""
+        return self.route_with_prediction(query)[0]
+
+
+router = EmbeddingRouter(AGENT_PROTOTYPES)
@@ -0,0 +1,117 @@
+"""
+Session layer - isolated per-request graph configs, session -> user mapping
+and an LRU of active sessions with idle eviction.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+
+# ==========================
+# SESSION CONFIGURATION
+# ==========================
+SESSION_MAX_ACTIVE = int(os.getenv("SESSION_MAX_ACTIVE", "1000"))
+SESSION_IDLE_TTL = int(os.getenv("SESSION_IDLE_TTL", "1800"))
+DEFAULT_USER_ID = "samantha"
+
+
+class SessionUserMismatch(ValueError):
+    """A request named a different user than the one the session is bound to."""
+
+
+class SessionManager:
+    """Hands out a fresh config per request so concurrent sessions never share state.
+
+    Sessions are kept in least-recently-used order; sessions idle for longer
+    than idle_ttl, or beyond max_sessions, are evicted and on_evict is called
+    with their thread id (e.g. to drop in-memory checkpoints).
+
+    A session is bound to its user when it is created; owner_lookup returns
+    the user of a thread that is no longer in the LRU (e.g. from its
+    checkpoint), so an evicted session can't be claimed by someone else.
+    """
+
+    def __init__(
+        self,
+        callbacks: Optional[List] = None,
+        max_sessions: int = SESSION_MAX_ACTIVE,
+        idle_ttl: int = SESSION_IDLE_TTL,
+        on_evict: Optional[Callable[[str], None]] = None,
+        owner_lookup: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.callbacks = callbacks or []
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.owner_lookup = owner_lookup
+        # session_id -> (user_id, last_seen)
+        self._sessions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, session_id: str, user_id: Optional[str] = None) -> Tuple[dict, str]:
+        """Touch the session and return (config, user_id) for one graph invocation.
+
+        Raises SessionUserMismatch when user_id differs from the session's user.
+        """
+        with self._lock:
+            known = self._sessions.get(session_id)
+        owner = known[0] if known else self._stored_owner(session_id)
+        if owner and user_id and user_id != owner:
+            logger.warning(f"Rejected user {user_id} for session {session_id} (bound to another user)")
+            raise SessionUserMismatch(f"Session {session_id} belongs to another user")
+
+        now = time.time()
+        with self._lock:
+            known = self._sessions.get(session_id)
+            user_id = (known[0] if known else owner) or user_id or DEFAULT_USER_ID
+            self._sessions[session_id] = (user_id, now)
+            self._sessions.move_to_end(session_id)
+            evicted = self._collect_evictions(now)
+
+        for thread_id in evicted:
+            self._evict(thread_id)
+
+        config = {
+            "configurable": {
+                "thread_id": session_id,
+                "user_id": user_id,
+            },
+            "callbacks": list(self.callbacks),
+        }
+        return config, user_id
+
+    def _stored_owner(self, session_id: str) -> Optional[str]:
+        if self.owner_lookup is None:
+            return None
+        try:
+            return self.owner_lookup(session_id)
+        except Exception as e:
+            logger.error(f"Error looking up the user of session {session_id}: {e}")
+            return None
+
+    def _collect_evictions(self, now: float) -> List[str]:
+        evicted = []
+        # Oldest sessions come first, so stop at the first one still active
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - last_seen <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            evicted.append(session_id)
+        return evicted
+
+    def _evict(self, thread_id: str):
+        logger.info(f"Evicting idle session {thread_id}")
+        if self.on_evict is None:
+            return
+        try:
+            self.on_evict(thread_id)
+        except Exception as e:
+            logger.error(f"Error evicting session {thread_id}: {e}")
+
+    def active_sessions(self) -> int:
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,85 @@
+"""
+Speculative specialist execution - runs the locally predicted specialist while
+the supervisor LLM is still deciding, and keeps the result only if it agrees.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from loguru import logger
+
+# ==========================
+# SPECULATION CONFIGURATION
+# ==========================
+SPECULATIVE_ENABLED = os.getenv("SPECULATIVE_ENABLED", "true").lower() == "true"
+# Minimum router similarity for the predicted specialist to be started early
+SPECULATIVE_MIN_SCORE = float(os.getenv("SPECULATIVE_MIN_SCORE", "0.30"))
+
+
+class SpeculationManager:
+    """Tracks in-flight speculative runs per turn and their hit/miss rates.
+
+    Runs are asyncio tasks - speculation only happens in the async graph,
+    where a wrong guess can actually be cancelled.
+    """
+
+    def __init__(self, max_pending: int = 256):
+        self.max_pending = max_pending
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, speculation_id: str, agent_name: str, future):
+        with self._lock:
+            self._pending[speculation_id] = (agent_name, future)
+            self.started += 1
+            while len(self._pending) > self.max_pending:
+                _, (_, stale) = self._pending.popitem(last=False)
+                stale.cancel()
+        logger.info(f"Speculatively started {agent_name}")
+
+    def resolve(self, speculation_id: Optional[str], decided_agent: str):
+        """Record the supervisor's decision - a mismatch cancels the speculative run."""
+        if speculation_id is None:
+            return
+        with self._lock:
+            entry = self._pending.get(speculation_id)
+            if entry is None:
+                return
+            agent_name, future = entry
+            if agent_name == decided_agent:
+                self.hits += 1
+                logger.info(f"Speculation hit: {agent_name}")
+                return
+            del self._pending[speculation_id]
+            self.misses += 1
+        future.cancel()
+        logger.info(f"Speculation miss: predicted {agent_name}, supervisor chose {decided_agent}")
+
+    def take(self, speculation_id: Optional[str], agent_name: str):
+        """Return the committed speculative future for this agent, if there is one."""
+        if speculation_id is None:
+            return None
+        with self._lock:
+            entry = self._pending.get(speculation_id)
+            if entry is None or entry[0] != agent_name:
+                return None
+            del self._pending[speculation_id]
+        return entry[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            decided = self.hits + self.misses
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / decided, 3) if decided else None,
+                "pending": len(self._pending),
+            }
+
+
+speculation_manager = SpeculationManager()
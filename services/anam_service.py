@@ -1,6 +1,7 @@
-import httpx
+import asyncio
 from typing import Dict, Any, Optional
 from config.settings import settings
+from services.http_client import http_client
 
 class AnamService:
     """Service for interacting with Anam AI API."""
@@ -60,12 +61,13 @@ class AnamService:
             if max_session_length_seconds:
                 payload["personaConfig"]["maxSessionLengthSeconds"] = max_session_length_seconds
 
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url, headers=self.headers, json=payload, timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
+            # Pooled sync client on a worker thread - callers run this on a throwaway
+            # event loop, which would otherwise get (and leak) its own AsyncClient
+            response = await asyncio.to_thread(
+                http_client.post, url, headers=self.headers, json=payload, timeout=30.0
+            )
+            response.raise_for_status()
+            return response.json()
 
         except Exception as e:
             print(f"Error creating session token: {e}")
@@ -0,0 +1,283 @@
+"""
+Cassettes - record real provider responses once and replay them offline.
+
+CASSETTE_MODE="record" saves every external response to
+<CASSETTE_DIR>/<CASSETTE_NAME>.json. "replay" answers from that file
+without touching the network, after an injected delay. The HTTP client
+and the LLM go through an httpx transport. SDK calls that don't use
+httpx (pyowm, yfinance, Tavily, Mem0) are wrapped at the function level
+with cassette.call.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+from loguru import logger
+
+# ==========================
+# CASSETTE CONFIGURATION
+# ==========================
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()  # "off", "record" or "replay"
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
+CASSETTE_NAME = os.getenv("CASSETTE_NAME", "default")
+# Delay before a replayed response: "recorded" (the original duration) or milliseconds
+CASSETTE_LATENCY = os.getenv("CASSETTE_LATENCY", "recorded").lower()
+CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0"))
+
+# Credentials never reach the cassette key or file
+SECRET_PARAMS = {"api_key", "apikey", "appid", "key", "token", "access_token"}
+# Decoded bodies are stored, so encoding/length headers would no longer match
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+class CassetteMiss(RuntimeError):
+    """Replay was asked for a response that was never recorded."""
+
+
+def _canonical_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _canonical_body(body: bytes) -> str:
+    if not body:
+        return ""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return hashlib.sha256(body).hexdigest()
+    if isinstance(payload, dict):
+        payload = {k: v for k, v in payload.items() if k.lower() not in SECRET_PARAMS}
+    return json.dumps(payload, sort_keys=True, default=str)
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+class Cassette:
+    """A named set of recorded interactions, keyed by request and replayed in recording order."""
+
+    def __init__(self, name: str = CASSETTE_NAME, directory: str = CASSETTE_DIR, mode: str = CASSETTE_MODE,
+                 latency: str = CASSETTE_LATENCY, latency_scale: float = CASSETTE_LATENCY_SCALE):
+        self.name = name
+        self.directory = directory
+        self.mode = mode
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self._interactions: Optional[Dict[str, list]] = None
+        self._replay_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    @property
+    def active(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.name}.json")
+
+    @property
+    def interactions(self) -> Dict[str, list]:
+        if self._interactions is None:
+            with self._lock:
+                if self._interactions is None:
+                    if os.path.exists(self.path):
+                        with open(self.path, encoding="utf-8") as f:
+                            self._interactions = json.load(f)
+                    else:
+                        self._interactions = {}
+                    logger.info(f"Cassette '{self.name}' ({self.mode}): {len(self._interactions)} recorded requests")
+        return self._interactions
+
+    # --------------------------
+    # Recording and lookup
+    # --------------------------
+    def _save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._interactions, f, indent=1, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def record(self, key: str, entry: dict):
+        interactions = self.interactions
+        with self._lock:
+            interactions.setdefault(key, []).append(entry)
+            self.recorded += 1
+            self._save()
+
+    def lookup(self, key: str, label: str) -> dict:
+        """Next recorded entry for a key - repeated requests cycle through their recordings."""
+        entries = self.interactions.get(key)
+        with self._lock:
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"No recording for {label} in cassette '{self.name}'")
+            index = self._replay_counts.get(key, 0)
+            self._replay_counts[key] = index + 1
+            self.replayed += 1
+            return entries[index % len(entries)]
+
+    def delay(self, entry: dict) -> float:
+        if self.latency == "recorded":
+            return entry.get("elapsed", 0.0) * self.latency_scale
+        return float(self.latency) / 1000 * self.latency_scale
+
+    # --------------------------
+    # HTTP (httpx transports)
+    # --------------------------
+    @staticmethod
+    def request_key(request: httpx.Request) -> str:
+        return _digest("http", request.method, _canonical_url(str(request.url)), _canonical_body(request.content))
+
+    def record_response(self, request: httpx.Request, response: httpx.Response, elapsed: float):
+        content = response.content
+        try:
+            body, encoding = content.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode(), "base64"
+        self.record(self.request_key(request), {
+            "request": f"{request.method} {_canonical_url(str(request.url))}",
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            "body": body,
+            "encoding": encoding,
+            "elapsed": round(elapsed, 4),
+        })
+
+    @staticmethod
+    def build_response(entry: dict, request: httpx.Request) -> httpx.Response:
+        body = entry["body"]
+        content = base64.b64decode(body) if entry.get("encoding") == "base64" else body.encode("utf-8")
+        return httpx.Response(entry["status"], headers=entry["headers"], content=content, request=request)
+
+    def transport(self, inner: httpx.BaseTransport) -> "CassetteTransport":
+        return CassetteTransport(self, inner)
+
+    def async_transport(self, inner: httpx.AsyncBaseTransport) -> "AsyncCassetteTransport":
+        return AsyncCassetteTransport(self, inner)
+
+    def llm_client_kwargs(self) -> dict:
+        """http_client / http_async_client for OpenAI-compatible chat models, or {} when off."""
+        if not self.active:
+            return {}
+        return {
+            "http_client": httpx.Client(transport=self.transport(httpx.HTTPTransport())),
+            "http_async_client": httpx.AsyncClient(transport=self.async_transport(httpx.AsyncHTTPTransport())),
+        }
+
+    # --------------------------
+    # SDK calls (function level)
+    # --------------------------
+    @staticmethod
+    def call_key(kind: str, payload: Any) -> str:
+        return _digest("call", kind, json.dumps(payload, sort_keys=True, default=str))
+
+    def call(self, kind: str, payload: Any, func: Callable[[], Any]) -> Any:
+        """Run func (record) or return its recorded JSON-serialisable result (replay)."""
+        if not self.active:
+            return func()
+        key = self.call_key(kind, payload)
+        if self.mode == "replay":
+            entry = self.lookup(key, kind)
+            time.sleep(self.delay(entry))
+            return entry["result"]
+        start = time.perf_counter()
+        result = func()
+        self.record(key, {"request": kind, "result": result, "elapsed": round(time.perf_counter() - start, 4)})
+        return result
+
+    async def acall(self, kind: str, payload: Any, func: Callable[[], Any]) -> Any:
+        """Async variant of call - func returns an awaitable."""
+        if not self.active:
+            return await func()
+        key = self.call_key(kind, payload)
+        if self.mode == "replay":
+            entry = self.lookup(key, kind)
+            await asyncio.sleep(self.delay(entry))
+            return entry["result"]
+        start = time.perf_counter()
+        result = await func()
+        self.record(key, {"request": kind, "result": result, "elapsed": round(time.perf_counter() - start, 4)})
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """Records responses from the wrapped transport, or replays them without the network."""
+
+    def __init__(self, cassette: Cassette, inner: httpx.BaseTransport):
+        self.cassette = cassette
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        if self.cassette.mode == "replay":
+            entry = self.cassette.lookup(self.cassette.request_key(request), f"{request.method} {request.url.host}{request.url.path}")
+            time.sleep(self.cassette.delay(entry))
+            return self.cassette.build_response(entry, request)
+
+        start = time.perf_counter()
+        response = self.inner.handle_request(request)
+        try:
+            response.read()
+        finally:
+            response.close()
+        self.cassette.record_response(request, response, time.perf_counter() - start)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        return httpx.Response(response.status_code, headers=headers, content=response.content, request=request)
+
+    def close(self):
+        self.inner.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """Async variant of CassetteTransport."""
+
+    def __init__(self, cassette: Cassette, inner: httpx.AsyncBaseTransport):
+        self.cassette = cassette
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        if self.cassette.mode == "replay":
+            entry = self.cassette.lookup(self.cassette.request_key(request), f"{request.method} {request.url.host}{request.url.path}")
+            await asyncio.sleep(self.cassette.delay(entry))
+            return self.cassette.build_response(entry, request)
+
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        self.cassette.record_response(request, response, time.perf_counter() - start)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        return httpx.Response(response.status_code, headers=headers, content=response.content, request=request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+# Global cassette - inactive unless CASSETTE_MODE is set
+cassette = Cassette()
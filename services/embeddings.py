@@ -0,0 +1,29 @@
+"""
+Shared MiniLM sentence embeddings used for local (in-process) semantic lookups.
+"""
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+@lru_cache(maxsize=1)
+def get_embeddings():
+    """Load the embedding model once per process (imported lazily - it pulls in torch)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed texts and return L2-normalised vectors, one row per text."""
+    vectors = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def embed_text(text: str) -> np.ndarray:
+    """Embed a single text as an L2-normalised vector."""
+    return embed_texts([text])[0]
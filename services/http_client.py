@@ -0,0 +1,198 @@
+"""
+HTTP Client - pooled keep-alive httpx clients shared by every external tool,
+with HTTP/2 when the h2 package is installed, per-host concurrency limits,
+per-provider rate limits, timeouts and retry with exponential backoff.
+"""
+import asyncio
+import importlib.util
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+from loguru import logger
+
+from services.cassette import cassette
+from services.rate_limiter import rate_limiter
+
+load_dotenv()
+
+# ==========================
+# HTTP CONFIGURATION
+# ==========================
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true" and importlib.util.find_spec("h2") is not None
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), 10.0)
+    return HTTP_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+
+
+class HttpClient:
+    """One sync client per process and one async client per event loop, created on first use."""
+
+    def __init__(self):
+        self._client: Optional[httpx.Client] = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._async_host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _options(asynchronous: bool = False) -> dict:
+        options = {
+            "http2": HTTP2_ENABLED,
+            "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            "limits": httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            "follow_redirects": True,
+        }
+        if cassette.active:
+            # A custom transport replaces the default one, so the pool settings move onto it
+            transport_options = {"http2": options.pop("http2"), "limits": options.pop("limits")}
+            if asynchronous:
+                options["transport"] = cassette.async_transport(httpx.AsyncHTTPTransport(**transport_options))
+            else:
+                options["transport"] = cassette.transport(httpx.HTTPTransport(**transport_options))
+        return options
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._options())
+                    logger.info(f"HTTP client ready (http2={HTTP2_ENABLED})")
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # AsyncClient connections belong to the loop that opened them (Streamlit pages create their own loops)
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(**self._options(asynchronous=True))
+            self._async_clients[loop] = client
+        return client
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+            return self._host_limits[host]
+
+    def _async_host_limit(self, url: str) -> asyncio.Semaphore:
+        limits = self._async_host_limits.setdefault(asyncio.get_running_loop(), {})
+        host = urlsplit(url).netloc
+        if host not in limits:
+            limits[host] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+        return limits[host]
+
+    def request(self, method: str, url: str, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+        """Send a request, retrying connection errors, 429 and 5xx responses with backoff."""
+        provider = rate_limiter.provider_for(url)
+        for attempt in range(retries + 1):
+            response = None
+            try:
+                with rate_limiter.slot(provider), self._host_limit(url):
+                    response = self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({e!r}), retrying")
+            delay = _retry_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                rate_limiter.throttle(provider, delay)
+            time.sleep(delay)
+        return response
+
+    async def arequest(self, method: str, url: str, retries: int = HTTP_RETRIES, **kwargs) -> httpx.Response:
+        """Async variant of request."""
+        provider = rate_limiter.provider_for(url)
+        for attempt in range(retries + 1):
+            response = None
+            try:
+                async with rate_limiter.aslot(provider), self._async_host_limit(url):
+                    response = await self.async_client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    return response
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({e!r}), retrying")
+            delay = _retry_delay(attempt, response)
+            if response is not None and response.status_code == 429:
+                rate_limiter.throttle(provider, delay)
+            await asyncio.sleep(delay)
+        return response
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    async def aget(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url: str, **kwargs) -> httpx.Response:
+        return await self.arequest("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        """Close the sync client and the running loop's async client."""
+        self.close()
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+def serpapi_search(params: dict) -> dict:
+    """Run a SerpApi search on the shared client - drop-in for GoogleSearch(params).get_dict()."""
+    params = dict(params)
+    params.setdefault("api_key", os.getenv("SERPAPI_API_KEY"))
+    params.setdefault("engine", "google")
+    params.setdefault("output", "json")
+    response = http_client.get(SERPAPI_URL, params=params)
+    try:
+        results = response.json()
+    except ValueError:
+        response.raise_for_status()
+        raise
+    if response.is_error and "error" not in results:
+        response.raise_for_status()
+    return results
+
+
+# Global client instance
+http_client = HttpClient()
@@ -0,0 +1,189 @@
+"""
+Memory Service - one memory backend shared by the agent and the memory tools.
+
+MEMORY_BACKEND selects the Mem0 cloud client ("mem0") or a local Chroma +
+MiniLM store ("local") with one collection per user, persisted in SQLite.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+from services.tracing import tracer
+from services.cassette import cassette
+from services.rate_limiter import rate_limiter
+
+load_dotenv()
+
+# ==========================
+# MEMORY CONFIGURATION
+# ==========================
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "mem0").lower()  # "mem0" or "local"
+LOCAL_MEMORY_PATH = os.getenv("LOCAL_MEMORY_PATH", "memory_db")
+LOCAL_MEMORY_TOP_K = int(os.getenv("LOCAL_MEMORY_TOP_K", "5"))
+# Cosine similarity below which a local memory is not considered relevant
+LOCAL_MEMORY_MIN_SCORE = float(os.getenv("LOCAL_MEMORY_MIN_SCORE", "0.25"))
+
+
+class Mem0Backend:
+    """Mem0 cloud memory - facts are extracted from the conversation by Mem0."""
+
+    name = "mem0"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # Imported here so importing the agent doesn't pay for the mem0 SDK
+                    from mem0 import MemoryClient
+                    self._client = MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
+        return self._client
+
+    def search(self, query: str, user_id: str, **kwargs) -> dict:
+        # Mem0 v2 API requires filters
+        filters = {
+            "OR": [
+                {
+                    "user_id": user_id
+                }
+            ]
+        }
+        with rate_limiter.slot("mem0"):
+            return cassette.call(
+                "mem0.search", [query, user_id, kwargs],
+                lambda: self.client.search(query, version="v2", filters=filters, **kwargs),
+            )
+
+    def add(self, messages: list, user_id: str) -> dict:
+        with rate_limiter.slot("mem0"):
+            return cassette.call("mem0.add", [messages, user_id], lambda: self.client.add(messages, user_id=user_id))
+
+
+class LocalMemoryBackend:
+    """Local memory on Chroma + MiniLM - one collection per user, persisted in SQLite.
+
+    Each user message is stored verbatim as a memory (no LLM fact extraction);
+    identical messages are de-duplicated by id. Results use Mem0's shape.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str = LOCAL_MEMORY_PATH):
+        self.path = path
+        self._client = None
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import chromadb
+                    self._client = chromadb.PersistentClient(path=self.path)
+        return self._client
+
+    @staticmethod
+    def _collection_name(user_id: str) -> str:
+        # Chroma names: 3-63 chars of [a-zA-Z0-9._-], starting and ending alphanumeric
+        safe = re.sub(r"[^a-zA-Z0-9_-]", "_", user_id)[:40].strip("_-") or "user"
+        return f"memories_{safe}_{hashlib.sha1(user_id.encode()).hexdigest()[:8]}"
+
+    def _collection(self, user_id: str):
+        collection = self._collections.get(user_id)
+        if collection is None:
+            collection = self.client.get_or_create_collection(
+                self._collection_name(user_id),
+                metadata={"hnsw:space": "cosine", "user_id": user_id},
+            )
+            self._collections[user_id] = collection
+        return collection
+
+    def search(self, query: str, user_id: str, limit: int = LOCAL_MEMORY_TOP_K, **kwargs) -> dict:
+        collection = self._collection(user_id)
+        if not query.strip():
+            # No query - the most recent memories (get_all_memories)
+            stored = collection.get(include=["documents", "metadatas"])
+            results = [
+                {"id": memory_id, "memory": document, "created_at": (metadata or {}).get("created_at")}
+                for memory_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+            ]
+            results.sort(key=lambda r: r["created_at"] or 0, reverse=True)
+            return {"results": results[:limit]}
+
+        count = collection.count()
+        if count == 0:
+            return {"results": []}
+
+        from services.embeddings import embed_text
+        found = collection.query(
+            query_embeddings=[embed_text(query).tolist()],
+            n_results=min(limit, count),
+            include=["documents", "metadatas", "distances"],
+        )
+        results = []
+        for memory_id, document, metadata, distance in zip(
+            found["ids"][0], found["documents"][0], found["metadatas"][0], found["distances"][0]
+        ):
+            score = 1.0 - distance
+            if score >= LOCAL_MEMORY_MIN_SCORE:
+                results.append({
+                    "id": memory_id,
+                    "memory": document,
+                    "score": round(score, 4),
+                    "created_at": (metadata or {}).get("created_at"),
+                })
+        return {"results": results}
+
+    def add(self, messages: list, user_id: str) -> dict:
+        texts = list(dict.fromkeys(
+            m["content"].strip() for m in messages
+            if m.get("role") == "user" and m.get("content", "").strip()
+        ))
+        if not texts:
+            return {"results": []}
+
+        from services.embeddings import embed_texts
+        ids = [hashlib.sha1(f"{user_id}:{text}".encode()).hexdigest() for text in texts]
+        now = time.time()
+        self._collection(user_id).upsert(
+            ids=ids,
+            documents=texts,
+            embeddings=embed_texts(texts).tolist(),
+            metadatas=[{"created_at": now} for _ in texts],
+        )
+        return {"results": [{"id": i, "memory": t, "event": "ADD"} for i, t in zip(ids, texts)]}
+
+
+class MemoryService:
+    """Lazily creates the configured memory backend on first use."""
+
+    def __init__(self, backend: str = MEMORY_BACKEND):
+        self.backend = LocalMemoryBackend() if backend == "local" else Mem0Backend()
+
+    @property
+    def client(self):
+        return self.backend.client
+
+    def search(self, query: str, user_id: str, **kwargs) -> dict:
+        """Search a user's memories - results are {"results": [{"memory": ...}, ...]}."""
+        with tracer.span(f"{self.backend.name}.search", "memory", user_id=user_id) as span:
+            result = self.backend.search(query, user_id, **kwargs)
+            span["results"] = len(result.get("results", []))
+        return result
+
+    def add(self, messages: list, user_id: str) -> dict:
+        """Store messages as memories for a user."""
+        with tracer.span(f"{self.backend.name}.add", "memory", user_id=user_id, messages=len(messages)):
+            return self.backend.add(messages, user_id)
+
+
+# Global service instance
+memory_service = MemoryService()
@@ -0,0 +1,261 @@
+"""
+Rate Limiter - per-provider token buckets and concurrency caps for the
+external APIs (SerpApi, Serper, Tavily, OpenWeatherMap, Yahoo Finance, Mem0).
+
+Bursts wait in a short queue instead of turning into 429s. Interactive
+turns go ahead of background work (job page prefetch, memory writes), and
+the time spent queueing is recorded per provider.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+# ==========================
+# RATE LIMIT CONFIGURATION
+# ==========================
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+# Seconds a request may queue for its provider before it fails
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "20"))
+# provider -> (requests per second, burst, concurrent requests)
+# RATE_LIMIT_<PROVIDER>="rate,burst,concurrency" overrides these
+PROVIDER_LIMITS = {
+    "serpapi": (5.0, 10, 5),
+    "serper": (5.0, 10, 5),
+    "tavily": (2.0, 5, 4),
+    "openweathermap": (1.0, 10, 4),  # Free plan: 60 calls per minute
+    "yahoo": (2.0, 5, 2),
+    "mem0": (5.0, 10, 4),
+}
+PROVIDER_HOSTS = {
+    "serpapi.com": "serpapi",
+    "google.serper.dev": "serper",
+    "api.tavily.com": "tavily",
+    "api.openweathermap.org": "openweathermap",
+    "api.mem0.ai": "mem0",
+}
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_POLL_INTERVAL = 0.05
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("rate_limit_priority", default=INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def background():
+    """Mark external calls made in this block (and this thread) as background work."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def provider_limits(provider: str) -> tuple:
+    override = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+    if override:
+        rate, burst, concurrency = override.split(",")
+        return float(rate), int(burst), int(concurrency)
+    return PROVIDER_LIMITS[provider]
+
+
+class RateLimitTimeout(RuntimeError):
+    """A request waited longer than RATE_LIMIT_MAX_WAIT for its provider."""
+
+
+class ProviderLimiter:
+    """Token bucket plus concurrency cap for one provider, shared by threads and event loops.
+
+    Background requests only start when no interactive request is waiting,
+    and always leave one concurrency slot free for interactive turns.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, concurrency: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.tokens = float(burst)
+        self.active = 0
+        self.waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._changed = threading.Condition()
+        # Metrics
+        self.requests = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.throttled = 0
+
+    def _try_acquire(self, priority: str, now: float) -> float:
+        """Take a slot and return 0, or return how long to wait before trying again."""
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if now < self.paused_until:
+            return self.paused_until - now
+        if priority == BACKGROUND:
+            if self.waiting[INTERACTIVE] or self.active >= max(1, self.concurrency - 1):
+                return _POLL_INTERVAL
+        elif self.active >= self.concurrency:
+            return _POLL_INTERVAL
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        self.active += 1
+        return 0.0
+
+    def _record(self, priority: str, waited: float):
+        self.requests[priority] += 1
+        if waited > 0.001:
+            self.queued += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def _timed_out(self, waited: float) -> RateLimitTimeout:
+        self.timeouts += 1
+        logger.warning(f"{self.name} request dropped after queueing {waited:.1f}s")
+        return RateLimitTimeout(f"{self.name} rate limit: no slot within {waited:.0f}s")
+
+    def acquire(self, priority: str = INTERACTIVE, timeout: float = RATE_LIMIT_MAX_WAIT):
+        start = time.monotonic()
+        with self._changed:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._try_acquire(priority, now)
+                    if delay == 0.0:
+                        break
+                    remaining = start + timeout - now
+                    if remaining <= 0:
+                        raise self._timed_out(now - start)
+                    self._changed.wait(min(delay, remaining))
+            finally:
+                self.waiting[priority] -= 1
+            self._record(priority, time.monotonic() - start)
+
+    async def aacquire(self, priority: str = INTERACTIVE, timeout: float = RATE_LIMIT_MAX_WAIT):
+        """Async variant of acquire - polls instead of blocking the event loop."""
+        start = time.monotonic()
+        with self._changed:
+            self.waiting[priority] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                with self._changed:
+                    delay = self._try_acquire(priority, now)
+                    if delay == 0.0:
+                        self._record(priority, now - start)
+                        return
+                remaining = start + timeout - now
+                if remaining <= 0:
+                    with self._changed:
+                        raise self._timed_out(now - start)
+                await asyncio.sleep(min(delay, remaining))
+        finally:
+            with self._changed:
+                self.waiting[priority] -= 1
+
+    def release(self):
+        with self._changed:
+            self.active -= 1
+            self._changed.notify_all()
+
+    def throttle(self, seconds: float):
+        """The provider answered 429 - hold every caller back, not just the one retrying."""
+        with self._changed:
+            self.throttled += 1
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        with self._changed:
+            total = sum(self.requests.values())
+            return {
+                "requests": dict(self.requests),
+                "active": self.active,
+                "waiting": sum(self.waiting.values()),
+                "queued": self.queued,
+                "avg_wait_ms": round(self.wait_total / total * 1000, 1) if total else 0.0,
+                "max_wait_ms": round(self.wait_max * 1000, 1),
+                "timeouts": self.timeouts,
+                "throttled": self.throttled,
+            }
+
+
+class RateLimiter:
+    """One ProviderLimiter per provider, created on first use."""
+
+    def __init__(self, enabled: bool = RATE_LIMIT_ENABLED):
+        self.enabled = enabled
+        self._providers: Dict[str, ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def provider_for(url: str) -> Optional[str]:
+        return PROVIDER_HOSTS.get(urlsplit(url).hostname or "")
+
+    def limiter(self, provider: Optional[str]) -> Optional[ProviderLimiter]:
+        if not self.enabled or provider not in PROVIDER_LIMITS:
+            return None
+        limiter = self._providers.get(provider)
+        if limiter is None:
+            with self._lock:
+                limiter = self._providers.get(provider)
+                if limiter is None:
+                    limiter = ProviderLimiter(provider, *provider_limits(provider))
+                    self._providers[provider] = limiter
+        return limiter
+
+    @contextmanager
+    def slot(self, provider: Optional[str]):
+        """Hold one of the provider's request slots for the duration of the block."""
+        limiter = self.limiter(provider)
+        if limiter is None:
+            yield
+            return
+        limiter.acquire(current_priority())
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    @asynccontextmanager
+    async def aslot(self, provider: Optional[str]):
+        """Async variant of slot."""
+        limiter = self.limiter(provider)
+        if limiter is None:
+            yield
+            return
+        await limiter.aacquire(current_priority())
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    def throttle(self, provider: Optional[str], seconds: float):
+        limiter = self.limiter(provider)
+        if limiter is not None:
+            limiter.throttle(seconds)
+            logger.warning(f"{provider} returned 429 - pausing requests for {seconds:.1f}s")
+
+    def stats(self) -> dict:
+        return {name: limiter.stats() for name, limiter in sorted(self._providers.items())}
+
+
+# Global limiter instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,308 @@
+"""
+Lightweight tracing - structured spans for graph nodes, LLM calls, tool calls
+and Mem0 calls, exported to a rotating local JSONL file and optionally to an
+OTLP/HTTP (JSON) collector.
+"""
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from loguru import logger
+
+# ==========================
+# TRACING CONFIGURATION
+# ==========================
+# Off by default - spans include tool inputs and user ids
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "5"))
+# e.g. http://localhost:4318 - spans are POSTed to <endpoint>/v1/traces
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "samantha")
+
+# (trace_id, span_id) of the innermost open span in this context
+_current_span: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex
+
+
+class JsonlSpanExporter:
+    """Appends one JSON span per line, rotating the file when it grows too large."""
+
+    def __init__(self, path: str = TRACE_FILE, max_bytes: int = TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def export(self, span: Dict[str, Any]):
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock:
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class OtlpSpanExporter:
+    """Batches spans and POSTs them as OTLP/HTTP JSON from a background thread."""
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, batch_size: int = 64):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=10000)
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, span: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    @staticmethod
+    def _to_otlp(span: Dict[str, Any]) -> dict:
+        attributes = [
+            {"key": key, "value": {"stringValue": str(value)}}
+            for key, value in span.get("attributes", {}).items()
+            if value is not None
+        ]
+        attributes.append({"key": "span.kind", "value": {"stringValue": span["kind"]}})
+        otlp_span = {
+            "traceId": span["trace_id"][:32],
+            "spanId": span["span_id"][:16],
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(int(span["start_time"] * 1e9)),
+            "endTimeUnixNano": str(int((span["start_time"] + span["duration_ms"] / 1000) * 1e9)),
+            "attributes": attributes,
+            "status": {"code": 2, "message": span["error"]} if span.get("error") else {"code": 1},
+        }
+        if span.get("parent_id"):
+            otlp_span["parentSpanId"] = span["parent_id"][:16]
+        return otlp_span
+
+    def _run(self):
+        import httpx
+
+        with httpx.Client(timeout=5.0) as client:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                payload = {
+                    "resourceSpans": [{
+                        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+                        "scopeSpans": [{"scope": {"name": "samantha.tracing"}, "spans": [self._to_otlp(s) for s in batch]}],
+                    }]
+                }
+                try:
+                    client.post(self.url, json=payload).raise_for_status()
+                except Exception as e:
+                    logger.warning(f"OTLP export failed ({len(batch)} spans dropped): {e}")
+
+
+class Tracer:
+    """Fans finished spans out to the configured exporters."""
+
+    def __init__(self):
+        self.exporters = []
+        if TRACING_ENABLED:
+            self.exporters.append(JsonlSpanExporter())
+            if TRACE_OTLP_ENDPOINT:
+                self.exporters.append(OtlpSpanExporter())
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def export(self, span: Dict[str, Any]):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning(f"Span export failed: {e}")
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes):
+        """Record a span around a block of code that LangChain callbacks don't see (e.g. Mem0)."""
+        if not self.enabled:
+            yield attributes
+            return
+        parent = _current_span.get()
+        trace_id = parent[0] if parent else _new_id()
+        span_id = _new_id()
+        token = _current_span.set((trace_id, span_id))
+        started, started_perf = time.time(), time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.export({
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "parent_id": parent[1] if parent else None,
+                "name": name,
+                "kind": kind,
+                "start_time": started,
+                "duration_ms": round((time.perf_counter() - started_perf) * 1000, 2),
+                "attributes": attributes,
+                "error": error,
+            })
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Turns LangChain callbacks into spans for graph nodes, LLM calls and tool calls.
+
+    Chains that are not graph nodes (internal runnables) are not recorded;
+    their children are re-parented to the nearest recorded ancestor.
+    """
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._runs: Dict[str, dict] = {}
+        self._parents: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def _ancestor(self, parent_run_id) -> Optional[dict]:
+        run_id = str(parent_run_id) if parent_run_id else None
+        while run_id:
+            run = self._runs.get(run_id)
+            if run is not None:
+                return run
+            run_id = self._parents.get(run_id)
+        return None
+
+    def _start(self, run_id, parent_run_id, name: str, kind: str, **attributes):
+        run_id = str(run_id)
+        with self._lock:
+            self._parents[run_id] = str(parent_run_id) if parent_run_id else None
+            parent = self._ancestor(parent_run_id)
+            run = {
+                "trace_id": parent["trace_id"] if parent else _new_id(),
+                "span_id": run_id.replace("-", ""),
+                "parent_id": parent["span_id"] if parent else None,
+                "name": name,
+                "kind": kind,
+                "start_time": time.time(),
+                "started_perf": time.perf_counter(),
+                "attributes": attributes,
+            }
+            self._runs[run_id] = run
+        if kind == "node":
+            # Lets tracer.span() blocks inside the node (Mem0 calls) attach to it
+            _current_span.set((run["trace_id"], run["span_id"]))
+
+    def _end(self, run_id, error: Optional[BaseException] = None, **attributes):
+        run_id = str(run_id)
+        with self._lock:
+            self._parents.pop(run_id, None)
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        run["attributes"].update(attributes)
+        run["duration_ms"] = round((time.perf_counter() - run.pop("started_perf")) * 1000, 2)
+        run["error"] = repr(error) if error else None
+        self.tracer.export(run)
+
+    def _forget(self, run_id):
+        with self._lock:
+            self._parents.pop(str(run_id), None)
+
+    # ---- chains (graph root and graph nodes) ----
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._start(run_id, None, name, "graph")
+        elif node and node == name:
+            self._start(run_id, parent_run_id, node, "node", step=(metadata or {}).get("langgraph_step"))
+        else:
+            with self._lock:
+                self._parents[str(run_id)] = str(parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if str(run_id) in self._runs:
+            self._end(run_id)
+        else:
+            self._forget(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        if str(run_id) in self._runs:
+            self._end(run_id, error=error)
+        else:
+            self._forget(run_id)
+
+    # ---- LLM calls ----
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        model_name = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name", "chat_model")
+        self._start(run_id, parent_run_id, f"llm:{model_name}", "llm", internal="internal" in (tags or []))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        attributes = {
+            "input_tokens": usage.get("prompt_tokens"),
+            "output_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+        }
+        if attributes["total_tokens"] is None:
+            try:
+                usage_metadata = response.generations[0][0].message.usage_metadata or {}
+                attributes = {
+                    "input_tokens": usage_metadata.get("input_tokens"),
+                    "output_tokens": usage_metadata.get("output_tokens"),
+                    "total_tokens": usage_metadata.get("total_tokens"),
+                }
+            except (AttributeError, IndexError):
+                pass
+        self._end(run_id, **attributes)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # ---- tool calls ----
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, parent_run_id, f"tool:{name}", "tool", input=str(input_str)[:500])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+
+tracer = Tracer()
+trace_handler = TraceCallbackHandler(tracer)
+
@@ -0,0 +1,52 @@
+import pytest
+
+from scripts.dispatch import is_tool_error, plan_direct_call
+from tools.output import with_failures
+
+
+@pytest.mark.parametrize("query", [
+    # Forecasts and choices need the specialist
+    "what is the weather in goa tomorrow",
+    "weather in goa next week",
+    "weather in goa this weekend",
+    "weather in paris or london",
+    # A second request after "and" is not a city
+    "weather in goa and what should i pack",
+    "weather in delhi and how to get there",
+    "weather like in summer and winter",
+    "weather in goa and mumbai tomorrow",
+    # Not places
+    "temperature for the oven",
+    "temperature in my room",
+    # Acronyms are not tickers
+    "compare AI and ML",
+    "compare AT and T",
+    "how is AI stock doing",
+    # Not recipes
+    "how to make money online",
+])
+def test_not_dispatched(query):
+    assert plan_direct_call(query) is None
+
+
+@pytest.mark.parametrize("query, tool, args", [
+    ("What's the weather in Hyderabad?", "get_weather", {"city": "hyderabad"}),
+    ("weather in new york", "get_weather", {"city": "new york"}),
+    ("weather in goa and mumbai", "get_weather_multi", {"cities": ["goa", "mumbai"]}),
+    ("what's the weather in delhi, pune and goa", "get_weather_multi", {"cities": ["delhi", "pune", "goa"]}),
+    ("What is the stock price of Apple?", "get_stock_price", {"ticker": "AAPL"}),
+    ("what is the stock price of TSLA", "get_stock_price", {"ticker": "TSLA"}),
+    ("compare apple and tesla", "get_stock_prices", {"tickers": ["AAPL", "TSLA"]}),
+    ("compare AAPL and MSFT stock prices", "get_stock_prices", {"tickers": ["AAPL", "MSFT"]}),
+    ("recipe for paneer butter masala", "search_recipes", {"query": "paneer butter masala"}),
+])
+def test_dispatched(query, tool, args):
+    call = plan_direct_call(query)
+    assert call is not None
+    assert (call["tool"], call["args"]) == (tool, args)
+
+
+def test_partial_results_are_tool_errors():
+    assert not is_tool_error(with_failures("🌤 Weather in Goa, IN", {}))
+    assert is_tool_error(with_failures("🌤 Weather in Goa, IN", {"atlantis": "city not found"}))
+    assert is_tool_error("❌ Error fetching weather: atlantis (city not found)")
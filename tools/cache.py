@@ -0,0 +1,205 @@
+"""
+Tool result cache - SQLite-backed TTL cache for the paid API tools, with
+per-tool freshness policies, argument normalisation, size-bounded eviction
+and hit/miss counters.
+
+Apply it under @tool so the tool keeps its name, docstring and schema:
+
+    @tool
+    @cached_tool()
+    def get_weather(city: str) -> str:
+        ...
+"""
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from tools.output import current_output_mode
+
+# ==========================
+# CACHE CONFIGURATION
+# ==========================
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_DB = os.getenv("TOOL_CACHE_DB", "tool_cache.sqlite")
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "5000"))
+# Seconds a result stays fresh - TOOL_CACHE_TTL_<TOOL_NAME> overrides these
+# (stock, weather and job tools keep their own data-level caches)
+TOOL_CACHE_TTLS = {
+    "search_flights": 15 * 60,
+    "search_flights_range": 15 * 60,
+    "search_hotels": 30 * 60,
+    "shopping_search": 60 * 60,
+    "search_recipes": 7 * 24 * 3600,
+}
+TOOL_CACHE_DEFAULT_TTL = int(os.getenv("TOOL_CACHE_DEFAULT_TTL", "300"))
+
+
+def tool_ttl(tool_name: str) -> int:
+    override = os.getenv(f"TOOL_CACHE_TTL_{tool_name.upper()}")
+    if override:
+        return int(override)
+    return TOOL_CACHE_TTLS.get(tool_name, TOOL_CACHE_DEFAULT_TTL)
+
+
+# Set by a tool that returned a partial result (some lookups failed) - see skip_cache
+_skip_store: contextvars.ContextVar[bool] = contextvars.ContextVar("tool_cache_skip_store", default=False)
+
+
+def skip_cache():
+    """Keep the current tool call's result out of the cache, e.g. when part of it failed."""
+    _skip_store.set(True)
+
+
+def is_error_result(result) -> bool:
+    """Tools report failures as text - those are never cached."""
+    return not isinstance(result, str) or not result or result.startswith(("Error", "❌", "No "))
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+class ToolResultCache:
+    """Cached tool results in SQLite, shared across restarts and worker processes."""
+
+    def __init__(self, path: str = TOOL_CACHE_DB, max_entries: int = TOOL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                " key TEXT PRIMARY KEY, tool TEXT NOT NULL, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tool_cache_last_access ON tool_cache(last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: dict) -> str:
+        payload = json.dumps(_normalize(arguments), sort_keys=True, default=str)
+        return f"{tool_name}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def get(self, tool_name: str, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT value, expires_at FROM tool_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > now:
+                self.conn.execute("UPDATE tool_cache SET last_access = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self.hits[tool_name] = self.hits.get(tool_name, 0) + 1
+                return row[0]
+            if row is not None:
+                self.conn.execute("DELETE FROM tool_cache WHERE key = ?", (key,))
+                self.conn.commit()
+            self.misses[tool_name] = self.misses.get(tool_name, 0) + 1
+        return None
+
+    def set(self, tool_name: str, key: str, value: str, ttl: int):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tool_cache (key, tool, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, tool_name, value, now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now: float):
+        self.conn.execute("DELETE FROM tool_cache WHERE expires_at <= ?", (now,))
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM tool_cache WHERE key IN (SELECT key FROM tool_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            logger.info(f"Tool cache evicted {count - self.max_entries} least recently used entries")
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self.conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()
+            tools = sorted(set(self.hits) | set(self.misses))
+            return {
+                "entries": entries,
+                "tools": {
+                    name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                    for name in tools
+                },
+            }
+
+
+tool_cache = ToolResultCache()
+
+
+def cached_tool(ttl: Optional[int] = None, name: Optional[str] = None) -> Callable:
+    """Cache a tool function's successful results for its TTL (see TOOL_CACHE_TTLS).
+
+    name sets the tool the cache entries belong to when the cached function is
+    a helper called by the tool rather than the tool itself.
+    """
+    def decorator(func):
+        tool_name = name or func.__name__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TOOL_CACHE_ENABLED:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            # Compact and rich renderings of the same call are cached separately
+            key = tool_cache.make_key(tool_name, {**bound.arguments, "_output": current_output_mode()})
+            try:
+                cached = tool_cache.get(tool_name, key)
+            except sqlite3.Error as e:
+                logger.warning(f"Tool cache read failed for {tool_name}: {e}")
+                cached = None
+            if cached is not None:
+                logger.info(f"Tool cache hit: {tool_name}")
+                return cached
+
+            token = _skip_store.set(False)
+            try:
+                result = func(*args, **kwargs)
+                skipped = _skip_store.get()
+            finally:
+                _skip_store.reset(token)
+            if skipped:
+                logger.info(f"Partial result from {tool_name} - not cached")
+            elif not is_error_result(result):
+                try:
+                    tool_cache.set(tool_name, key, result, ttl if ttl is not None else tool_ttl(tool_name))
+                except sqlite3.Error as e:
+                    logger.warning(f"Tool cache write failed for {tool_name}: {e}")
+            return result
+
+        return wrapper
+    return decorator
@@ -3,6 +3,7 @@ from langchain.tools import tool
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from loguru import logger
+from tools.output import compact, compact_mode
 
 # Configuration
 CHROMA_PATH = "chroma_db"
@@ -40,6 +41,19 @@ def database_search(query: str) -> str:
         if not results:
             return f"❌ No relevant information found in the database for '{query}'."
             
+        if compact_mode():
+            return compact({
+                "query": query,
+                "results": [
+                    {
+                        "source": os.path.basename(doc.metadata.get("source", "Unknown")),
+                        "page": doc.metadata.get("page"),
+                        "content": doc.page_content,
+                    }
+                    for doc in results
+                ],
+            })
+            
         # Format output
         output = f"📚 Database Results for '{query}'\n\n"
         
@@ -1,13 +1,34 @@
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from dotenv import load_dotenv
 from langchain.tools import tool
-from serpapi import GoogleSearch
+from tools.cache import cached_tool, skip_cache
+from services.http_client import serpapi_search
+from tools.output import compact, compact_mode
 from loguru import logger
 from typing import Optional
 
 load_dotenv()
 
+
+def _compact_flight(flight_group: dict) -> dict:
+    """One itinerary as the fields the LLM actually compares."""
+    segments = flight_group.get("flights", [])
+    first = segments[0] if segments else {}
+    return {
+        "airline": first.get("airline"),
+        "flight_number": first.get("flight_number"),
+        "price": flight_group.get("price"),
+        "duration_min": flight_group.get("total_duration"),
+        "departure": first.get("departure_airport", {}).get("time"),
+        "arrival": segments[-1].get("arrival_airport", {}).get("time") if segments else None,
+        "stops": len(flight_group.get("layovers", [])),
+    }
+
 @tool
+@cached_tool()
 def search_flights(
     origin: str,
     destination: str,
@@ -47,8 +68,7 @@ def search_flights(
             
         logger.info(f"Searching Google Flights via SerpApi: {origin} -> {destination} on {departure_date}")
         
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = serpapi_search(params)
         
         if "error" in results:
             return f"❌ SerpApi Error: {results['error']}"
@@ -62,6 +82,15 @@ def search_flights(
         if not all_flights:
             return f"❌ No flights found for {origin} to {destination} on {departure_date}."
             
+        if compact_mode():
+            return compact({
+                "origin": origin,
+                "destination": destination,
+                "departure_date": departure_date,
+                "return_date": return_date,
+                "flights": [_compact_flight(flight_group) for flight_group in all_flights[:5]],
+            })
+            
         output = f"✈️ *Flights from {origin} to {destination}*\n"
         output += f"📅 Departure: {departure_date}"
         if return_date:
@@ -115,3 +144,138 @@ def search_flights(
     except Exception as e:
         logger.error(f"Error searching flights: {e}")
         return f"❌ Error executing flight search: {str(e)}"
+
+
+# ==========================
+# DATE-RANGE FLIGHT SEARCH
+# ==========================
+FLIGHT_RANGE_MAX_DAYS = int(os.getenv("FLIGHT_RANGE_MAX_DAYS", "14"))
+FLIGHT_RANGE_CONCURRENCY = int(os.getenv("FLIGHT_RANGE_CONCURRENCY", "5"))
+
+
+def _cheapest_flight(origin: str, destination: str, departure_date: str) -> Optional[dict]:
+    """Cheapest one-way flight for a single day, or None when there are none."""
+    params = {
+        "api_key": os.getenv("SERPAPI_API_KEY"),
+        "engine": "google_flights",
+        "hl": "en",
+        "gl": "us",
+        "type": "2",  # One way
+        "departure_id": origin,
+        "arrival_id": destination,
+        "outbound_date": departure_date,
+        "currency": "INR"
+    }
+    results = serpapi_search(params)
+    if "error" in results:
+        raise RuntimeError(results["error"])
+
+    priced = [f for f in results.get("best_flights", []) + results.get("other_flights", []) if f.get("price")]
+    if not priced:
+        return None
+
+    cheapest = min(priced, key=lambda f: f["price"])
+    segments = cheapest.get("flights", [])
+    first_segment = segments[0] if segments else {}
+    dep_time_full = first_segment.get("departure_airport", {}).get("time", "")
+    return {
+        "date": departure_date,
+        "price": cheapest["price"],
+        "airline": first_segment.get("airline", "Unknown"),
+        "flight_number": first_segment.get("flight_number", ""),
+        "departure": dep_time_full.split(" ")[1] if " " in dep_time_full else dep_time_full,
+        "duration": cheapest.get("total_duration", "N/A"),
+        "stops": len(cheapest.get("layovers", [])),
+    }
+
+
+@tool
+def search_flights_range(
+    origin: str,
+    destination: str,
+    start_date: Optional[str] = None,
+    days: int = 7
+) -> str:
+    """
+    Find the cheapest flight for every day in a date range with one call, using Google Flights via SerpApi.
+    Use this instead of calling search_flights once per date, e.g. "flights from DEL to BOM for the next 10 days".
+    
+    Args:
+        origin: Departure Airport Code (e.g., "DEL", "HYD")
+        destination: Arrival Airport Code (e.g., "BOM", "DXB")
+        start_date: First departure date in YYYY-MM-DD format (default: today)
+        days: Number of consecutive days to search (default: 7, max: 14)
+    
+    Returns:
+        The cheapest flight per day and the cheapest day overall.
+    """
+    try:
+        today = date.today()
+        first_day = max(date.fromisoformat(start_date), today) if start_date else today
+    except ValueError as e:
+        return f"❌ Error: invalid date ({str(e)}). Use YYYY-MM-DD."
+    # Resolve the range before the cache lookup - "from today" must not be served tomorrow
+    return _search_flights_range(origin, destination, first_day.isoformat(), max(1, min(days, FLIGHT_RANGE_MAX_DAYS)))
+
+
+@cached_tool(name="search_flights_range")
+def _search_flights_range(origin: str, destination: str, first_day: str, days: int) -> str:
+    """Cheapest flight per day for `days` days from first_day (YYYY-MM-DD)."""
+    try:
+        if not os.getenv("SERPAPI_API_KEY"):
+            return "❌ Error: SERPAPI_API_KEY not found in environment variables."
+
+        start = date.fromisoformat(first_day)
+        dates = [(start + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+        logger.info(f"Searching Google Flights via SerpApi: {origin} -> {destination} for {days} days from {dates[0]}")
+
+        # One SerpApi request per day, run concurrently
+        with ThreadPoolExecutor(max_workers=FLIGHT_RANGE_CONCURRENCY, thread_name_prefix="flight-range") as pool:
+            # Each worker runs in a copy of this context - keeps the rate-limit priority, output mode and trace span
+            futures = {
+                day: pool.submit(contextvars.copy_context().run, _cheapest_flight, origin, destination, day)
+                for day in dates
+            }
+
+        output = f"✈️ *Cheapest flights from {origin} to {destination}*\n"
+        output += f"📅 {dates[0]} to {dates[-1]}\n\n"
+
+        found = []
+        for day, future in futures.items():
+            try:
+                flight = future.result()
+            except Exception as e:
+                logger.warning(f"Flight search failed for {day}: {e}")
+                output += f"• {day}: search failed\n"
+                # A transient failure shouldn't stay in the matrix for the full TTL
+                skip_cache()
+                continue
+            if flight is None:
+                output += f"• {day}: no flights\n"
+                continue
+            found.append(flight)
+            stops = "Non-stop" if flight["stops"] == 0 else f"{flight['stops']} stop(s)"
+            output += (
+                f"• {day}: ₹{flight['price']} | {flight['airline']} {flight['flight_number']} | "
+                f"🛫 {flight['departure']} | ⏱️ {flight['duration']} min | {stops}\n"
+            )
+
+        if not found:
+            return f"❌ No flights found for {origin} to {destination} between {dates[0]} and {dates[-1]}."
+
+        best = min(found, key=lambda f: f["price"])
+        if compact_mode():
+            return compact({
+                "origin": origin,
+                "destination": destination,
+                "currency": "INR",
+                "cheapest_date": best["date"],
+                "days": found,
+            })
+        output += f"\n💰 Cheapest day: {best['date']} - ₹{best['price']} with {best['airline']}"
+        return output
+
+    except Exception as e:
+        logger.error(f"Error searching flight date range: {e}")
+        return f"❌ Error executing flight search: {str(e)}"
@@ -1,13 +1,16 @@
 import os
 from dotenv import load_dotenv
 from langchain.tools import tool
-from serpapi import GoogleSearch
+from tools.cache import cached_tool
+from services.http_client import serpapi_search
 from loguru import logger
+from tools.output import compact, compact_mode
 from typing import Optional
 
 load_dotenv()
 
 @tool
+@cached_tool()
 def search_hotels(
     location: str,
     check_in: str,
@@ -45,8 +48,7 @@ def search_hotels(
         
         logger.info(f"Searching Google Hotels via SerpApi: {location} ({check_in} to {check_out})")
         
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = serpapi_search(params)
         
         if "error" in results:
             return f"❌ SerpApi Error: {results['error']}"
@@ -63,6 +65,23 @@ def search_hotels(
         if not properties:
             return f"❌ No hotels found for {location} from {check_in} to {check_out}."
             
+        if compact_mode():
+            return compact({
+                "location": location,
+                "check_in": check_in,
+                "check_out": check_out,
+                "hotels": [
+                    {
+                        "name": hotel.get("name"),
+                        "price": hotel.get("price") or hotel.get("rate_per_night", {}).get("lowest"),
+                        "rating": hotel.get("overall_rating"),
+                        "reviews": hotel.get("reviews"),
+                        "amenities": hotel.get("amenities", [])[:3],
+                    }
+                    for hotel in properties[:5]
+                ],
+            })
+            
         output = f"🏨 *Hotels in {location}*\n"
         output += f"📅 Dates: {check_in} to {check_out} ({guests} guests)\n\n"
         
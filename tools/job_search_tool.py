@@ -1,24 +1,157 @@
-from langchain_community.tools.google_jobs import GoogleJobsQueryRun
-from langchain_community.utilities.google_jobs import GoogleJobsAPIWrapper
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
 from langchain.tools import tool
 from loguru import logger
+from services.http_client import serpapi_search
+from services.rate_limiter import background
+
+# ==========================
+# JOBS CONFIGURATION
+# ==========================
+JOBS_CACHE_TTL = int(os.getenv("JOBS_CACHE_TTL", "3600"))
+JOBS_CACHE_SIZE = int(os.getenv("JOBS_CACHE_SIZE", "256"))
+# Pages fetched in the background after the first one
+JOBS_MAX_PAGES = int(os.getenv("JOBS_MAX_PAGES", "3"))
+# How long a request for a later page waits for its background fetch
+JOBS_PAGE_WAIT = float(os.getenv("JOBS_PAGE_WAIT", "5"))
+
+
+class JobSearch:
+    """Pages of one search - page 1 is fetched inline, the rest in the background."""
+
+    def __init__(self):
+        self.pages: List[list] = []
+        self.next_page_token: Optional[str] = None
+        self.complete = False
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.changed = threading.Condition()
+
+
+class JobsClient:
+    """Long-lived Google Jobs client with a per-query cache and background pagination."""
+
+    def __init__(self):
+        self._searches: "OrderedDict[tuple, JobSearch]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._prefetch = ThreadPoolExecutor(max_workers=2, thread_name_prefix="jobs-prefetch")
+
+    @staticmethod
+    def _key(query: str, location: Optional[str]) -> tuple:
+        return " ".join(query.lower().split()), " ".join((location or "").lower().split())
+
+    def _fetch(self, query: str, location: Optional[str], token: Optional[str]) -> dict:
+        params = {"engine": "google_jobs", "q": query}
+        if location:
+            params["location"] = location
+        if token:
+            params["next_page_token"] = token
+        return serpapi_search(params)
+
+    def _store_page(self, search: JobSearch, results: dict):
+        with search.changed:
+            if "error" in results:
+                # SerpApi reports the end of the results as an error on the next page
+                search.error = None if search.pages else results["error"]
+                search.complete = True
+            else:
+                search.pages.append(results.get("jobs_results", []))
+                search.next_page_token = results.get("serpapi_pagination", {}).get("next_page_token")
+                search.complete = not search.next_page_token or len(search.pages) >= JOBS_MAX_PAGES
+            search.changed.notify_all()
+
+    def _prefetch_pages(self, search: JobSearch, query: str, location: Optional[str]):
+        while not search.complete:
+            try:
+                # Yields SerpApi capacity to interactive turns
+                with background():
+                    results = self._fetch(query, location, search.next_page_token)
+                self._store_page(search, results)
+            except Exception as e:
+                logger.warning(f"Background job page fetch failed for '{query}': {e}")
+                with search.changed:
+                    search.complete = True
+                    search.changed.notify_all()
+        logger.info(f"Prefetched {len(search.pages)} job pages for '{query}'")
+
+    def _search(self, query: str, location: Optional[str]) -> JobSearch:
+        key = self._key(query, location)
+        with self._lock:
+            search = self._searches.get(key)
+            if search is not None and time.time() - search.created_at < JOBS_CACHE_TTL and not search.error:
+                self._searches.move_to_end(key)
+                return search
+            search = JobSearch()
+            self._searches[key] = search
+            while len(self._searches) > JOBS_CACHE_SIZE:
+                self._searches.popitem(last=False)
+
+        # Page 1 inline; the following pages stream in while the agent answers
+        try:
+            self._store_page(search, self._fetch(query, location, None))
+        except Exception as e:
+            with search.changed:
+                search.error = str(e)
+                search.complete = True
+                search.changed.notify_all()
+            raise
+        if not search.complete:
+            self._prefetch.submit(self._prefetch_pages, search, query, location)
+        return search
+
+    def page(self, query: str, location: Optional[str] = None, page: int = 1):
+        """Return (jobs on the page, whether more pages exist, error)."""
+        search = self._search(query, location)
+        with search.changed:
+            search.changed.wait_for(lambda: len(search.pages) >= page or search.complete, timeout=JOBS_PAGE_WAIT)
+            jobs = search.pages[page - 1] if len(search.pages) >= page else []
+            more = len(search.pages) > page or not search.complete
+            return jobs, more, search.error
+
+
+jobs_client = JobsClient()
+
 
 @tool
-def job_search(query: str) -> str:
+def job_search(query: str, location: Optional[str] = None, page: int = 1) -> str:
     """
     Search for jobs using Google Jobs via SerpApi.
     Useful for finding job postings, employment opportunities, and career openings.
     
     Args:
         query: Search query for jobs (e.g., "entry level physics jobs", "software engineer remote")
+        location: Optional location to search in (e.g., "Bangalore, India")
+        page: Result page (default: 1). Later pages are fetched in the background, ask for them only if the user wants more.
         
     Returns:
         A string containing relevant job postings found.
     """
     try:
-        api_wrapper = GoogleJobsAPIWrapper()
-        job_tool = GoogleJobsQueryRun(api_wrapper=api_wrapper)
-        result = job_tool.run(query)
+        jobs, more, error = jobs_client.page(query, location, max(page, 1))
+        if error:
+            return f"Error searching for jobs: {error}"
+        if not jobs:
+            return "No jobs found" if page <= 1 else f"No more jobs found after page {page - 1}"
+
+        postings = []
+        for job in jobs:
+            description = job.get("description", "")
+            if len(description) > 200:
+                description = description[:200] + "..."
+            postings.append(
+                f"Job Title: {job.get('title', 'N/A')}\n"
+                f"Company Name: {job.get('company_name', 'N/A')}\n"
+                f"Location: {job.get('location', 'N/A')}\n"
+                f"Description: {description}"
+            )
+        result = "\n_______________________________________________\n".join(postings)
+        if more:
+            result += f"\n\n(Page {page} - more results available with page={page + 1})"
         return result
     except Exception as e:
         logger.error(f"Error searching for jobs: {e}")
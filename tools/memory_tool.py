@@ -2,39 +2,29 @@
 Memory Tool - Allows the agent to search and retrieve memories
 """
 from langchain.tools import tool
-from mem0 import MemoryClient
-import os
-from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+from services.memory_service import memory_service
+from scripts.sessions import DEFAULT_USER_ID
 
-load_dotenv()
 
-# Initialize Mem0 client
-mem0 = MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
+def _session_user(config: RunnableConfig) -> str:
+    # The session's user comes from the graph config - never from the model's arguments
+    return (config or {}).get("configurable", {}).get("user_id") or DEFAULT_USER_ID
 
 @tool
-def search_memories(query: str, user_id: str = "samantha") -> str:
+def search_memories(query: str, config: RunnableConfig) -> str:
     """
     Search through stored memories to find relevant information about the user.
     Use this when the user asks about past conversations, preferences, or personal information.
     
     Args:
         query: The search query to find relevant memories
-        user_id: The user ID to search memories for (default: "samantha")
     
     Returns:
         A formatted string containing relevant memories
     """
     try:
-        # Mem0 v2 API requires filters
-        filters = {
-            "OR": [
-                {
-                    "user_id": user_id
-                }
-            ]
-        }
-        
-        memories = mem0.search(query, version="v2", filters=filters)
+        memories = memory_service.search(query, _session_user(config))
         memory_list = memories.get('results', [])
         
         if memory_list:
@@ -48,29 +38,17 @@ def search_memories(query: str, user_id: str = "samantha") -> str:
         return f"Error searching memories: {str(e)}"
 
 @tool
-def get_all_memories(user_id: str = "samantha") -> str:
+def get_all_memories(config: RunnableConfig) -> str:
     """
-    Retrieve all stored memories for a user.
+    Retrieve all stored memories for the current user.
     Use this when the user asks "what do you know about me?" or "what do you remember?"
     
-    Args:
-        user_id: The user ID to retrieve memories for (default: "samantha")
-    
     Returns:
         A formatted string containing all memories
     """
     try:
-        # Get all memories for the user
-        filters = {
-            "OR": [
-                {
-                    "user_id": user_id
-                }
-            ]
-        }
-        
         # Use a broad query to get all memories
-        memories = mem0.search("", version="v2", filters=filters, limit=50)
+        memories = memory_service.search("", _session_user(config), limit=50)
         memory_list = memories.get('results', [])
         
         if memory_list:
@@ -0,0 +1,59 @@
+"""
+Tool output modes - "compact" tools return minimal JSON records for the LLM,
+"rich" tools return the emoji-decorated markdown shown directly to users.
+"""
+import contextvars
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict
+
+# ==========================
+# OUTPUT CONFIGURATION
+# ==========================
+# Default for tool results fed back into an LLM call
+TOOL_OUTPUT_MODE = os.getenv("TOOL_OUTPUT_MODE", "compact").lower()  # "compact" or "rich"
+
+# Heads the section of a multi-lookup result that lists the lookups which failed
+PARTIAL_FAILURE_HEADER = "⚠️ Failed lookups:"
+
+_output_mode: contextvars.ContextVar[str] = contextvars.ContextVar("tool_output_mode", default=TOOL_OUTPUT_MODE)
+
+
+def current_output_mode() -> str:
+    return _output_mode.get()
+
+
+def compact_mode() -> bool:
+    return _output_mode.get() == "compact"
+
+
+@contextmanager
+def output_mode(mode: str):
+    """Run tools in this block with the given output mode (e.g. "rich" when the result is the reply)."""
+    token = _output_mode.set(mode)
+    try:
+        yield
+    finally:
+        _output_mode.reset(token)
+
+
+def _prune(value):
+    if isinstance(value, dict):
+        return {k: _prune(v) for k, v in value.items() if v not in (None, "", [], {}, "N/A")}
+    if isinstance(value, list):
+        return [_prune(v) for v in value]
+    return value
+
+
+def compact(payload: dict) -> str:
+    """Serialise a tool result as minimal JSON - empty and N/A fields are dropped."""
+    return json.dumps(_prune(payload), ensure_ascii=False, separators=(",", ":"))
+
+
+def with_failures(text: str, failures: Dict[str, str]) -> str:
+    """Append a PARTIAL_FAILURE_HEADER section so callers can tell the result is incomplete."""
+    if not failures:
+        return text
+    lines = "\n".join(f"- {item}: {error}" for item, error in failures.items())
+    return f"{text}\n\n{PARTIAL_FAILURE_HEADER}\n{lines}"
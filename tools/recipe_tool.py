@@ -1,13 +1,16 @@
 import os
 from dotenv import load_dotenv
 from langchain.tools import tool
-from serpapi import GoogleSearch
+from tools.cache import cached_tool
+from services.http_client import serpapi_search
 from loguru import logger
+from tools.output import compact, compact_mode
 from typing import Optional
 
 load_dotenv()
 
 @tool
+@cached_tool()
 def search_recipes(
     query: str,
     location: Optional[str] = None,
@@ -47,8 +50,7 @@ def search_recipes(
         
         logger.info(f"Searching recipes via SerpApi: {query}")
         
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = serpapi_search(params)
         
         if "error" in results:
             return f"❌ SerpApi Error: {results['error']}"
@@ -59,6 +61,23 @@ def search_recipes(
         if not recipes:
             return f"❌ No recipes found for '{query}'."
             
+        # Only what the LLM needs to answer - no thumbnails, badges or links
+        if compact_mode():
+            return compact({
+                "query": query,
+                "recipes": [
+                    {
+                        "title": recipe.get("title"),
+                        "source": recipe.get("source"),
+                        "rating": recipe.get("rating"),
+                        "reviews": recipe.get("reviews"),
+                        "time": recipe.get("total_time"),
+                        "ingredients": recipe.get("ingredients", [])[:5],
+                    }
+                    for recipe in recipes[:8]
+                ],
+            })
+            
         # Build formatted output
         output = f"👨‍🍳 *Recipes for: {query}*\n\n"
         
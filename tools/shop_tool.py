@@ -1,13 +1,16 @@
 import os
-import json
-import requests
+import httpx
 from dotenv import load_dotenv
 from langchain.tools import tool
+from tools.cache import cached_tool
 from loguru import logger
+from services.http_client import http_client
+from tools.output import compact, compact_mode
 
 load_dotenv()
 
 @tool
+@cached_tool()
 def shopping_search(query: str, num_results: int = 10) -> str:
     """
     Search for products using Google Shopping via Serper API.
@@ -23,17 +26,17 @@ def shopping_search(query: str, num_results: int = 10) -> str:
     try:
         url = "https://google.serper.dev/shopping"
         
-        payload = json.dumps({
+        payload = {
             "q": query,
             "num": min(num_results, 40)  # Limit to 40 max
-        })
+        }
         
         headers = {
             'X-API-KEY': os.getenv("SERPER_API_KEY"),
             'Content-Type': 'application/json'
         }
         
-        response = requests.post(url, headers=headers, data=payload)
+        response = http_client.post(url, headers=headers, json=payload)
         response.raise_for_status()
         
         data = response.json()
@@ -42,6 +45,21 @@ def shopping_search(query: str, num_results: int = 10) -> str:
         if not shopping_results:
             return f"❌ No products found for '{query}'."
         
+        if compact_mode():
+            return compact({
+                "query": query,
+                "products": [
+                    {
+                        "title": item.get("title"),
+                        "price": item.get("price"),
+                        "source": item.get("source"),
+                        "rating": item.get("rating"),
+                        "reviews": item.get("ratingCount"),
+                    }
+                    for item in shopping_results[:num_results]
+                ],
+            })
+        
         # Format output
         output = f"🛍️ *Shopping Results for '{query}'*\n\n"
         
@@ -67,7 +85,7 @@ def shopping_search(query: str, num_results: int = 10) -> str:
         
         return output
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Request error in shopping search: {e}")
         return f"❌ Error connecting to shopping search API: {str(e)}"
     except Exception as e:
@@ -1,5 +1,120 @@
+import json
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, List
+
 import yfinance as yf
 from langchain.tools import tool
+from loguru import logger
+
+from services.cassette import cassette
+from services.rate_limiter import rate_limiter
+
+# ==========================
+# STOCK CACHE CONFIGURATION
+# ==========================
+STOCK_QUOTE_TTL = int(os.getenv("STOCK_QUOTE_TTL", "30"))
+# Name / sector / market cap, refreshed once per day
+STOCK_FUNDAMENTALS_FILE = os.getenv("STOCK_FUNDAMENTALS_FILE", "stock_fundamentals.json")
+
+_quotes: Dict[str, tuple] = {}  # ticker -> (price, previous close, fetched_at)
+_quotes_lock = threading.Lock()
+_fundamentals_lock = threading.Lock()
+
+
+def _normalize_tickers(tickers: List[str]) -> List[str]:
+    return list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+
+
+def _download_closes(tickers: List[str]) -> Dict[str, List[float]]:
+    """Last two daily closes per ticker from one yf.download call."""
+    # A few days of daily bars so weekends and holidays still have a last close
+    data = yf.download(tickers, period="5d", interval="1d", group_by="column",
+                       auto_adjust=False, progress=False, threads=False)
+    if data is None or data.empty:
+        return {}
+    closes = data["Close"]
+    if not hasattr(closes, "columns"):
+        closes = closes.to_frame(name=tickers[0])
+
+    result = {}
+    for ticker in tickers:
+        if ticker not in closes.columns:
+            continue
+        series = closes[ticker].dropna()
+        if not series.empty:
+            result[ticker] = [float(value) for value in series.iloc[-2:]]
+    return result
+
+
+def fetch_quotes(tickers: List[str]) -> Dict[str, tuple]:
+    """Return {ticker: (price, previous close)} - all uncached symbols in one yf.download call."""
+    tickers = _normalize_tickers(tickers)
+    now = time.time()
+    with _quotes_lock:
+        quotes = {t: _quotes[t][:2] for t in tickers if t in _quotes and now - _quotes[t][2] < STOCK_QUOTE_TTL}
+    missing = [t for t in tickers if t not in quotes]
+    if not missing:
+        return quotes
+
+    with rate_limiter.slot("yahoo"):
+        closes = cassette.call("yahoo.download", missing, lambda: _download_closes(missing))
+    if not closes:
+        return quotes
+
+    with _quotes_lock:
+        for ticker, series in closes.items():
+            price = series[-1]
+            previous = series[-2] if len(series) > 1 else None
+            _quotes[ticker] = (price, previous, now)
+            quotes[ticker] = (price, previous)
+    logger.info(f"Fetched {len(missing)} stock quotes in one request")
+    return quotes
+
+
+def _load_fundamentals() -> dict:
+    if not os.path.exists(STOCK_FUNDAMENTALS_FILE):
+        return {}
+    try:
+        with open(STOCK_FUNDAMENTALS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable fundamentals cache: {e}")
+        return {}
+
+
+def _ticker_info(ticker: str) -> dict:
+    info = yf.Ticker(ticker).info
+    return {key: info.get(key) for key in ("longName", "sector", "marketCap") if info.get(key) is not None}
+
+
+def fetch_fundamentals(ticker: str) -> dict:
+    """Name, sector and market cap for a ticker - stock.info is slow, so it is cached on disk for the day."""
+    ticker = ticker.strip().upper()
+    today = date.today().isoformat()
+    with _fundamentals_lock:
+        cached = _load_fundamentals().get(ticker)
+    if cached and cached.get("fetched_on") == today:
+        return cached
+
+    with rate_limiter.slot("yahoo"):
+        info = cassette.call("yahoo.info", ticker, lambda: _ticker_info(ticker))
+    fundamentals = {
+        "name": info.get("longName", "Unknown"),
+        "sector": info.get("sector", "Unknown"),
+        "market_cap": info.get("marketCap", "N/A"),
+        "fetched_on": today,
+    }
+    with _fundamentals_lock:
+        stored = _load_fundamentals()
+        stored[ticker] = fundamentals
+        temp_path = f"{STOCK_FUNDAMENTALS_FILE}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(temp_path, STOCK_FUNDAMENTALS_FILE)
+    return fundamentals
 
 # ==========================
 # YFINANCE TOOLS
@@ -9,29 +124,53 @@ from langchain.tools import tool
 def get_stock_price(ticker: str) -> str:
     """Get the latest stock price for a ticker symbol like AAPL or TSLA."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.history(period="1d")
+        quote = fetch_quotes([ticker]).get(ticker.strip().upper())
 
-        if info.empty:
+        if quote is None:
             return f"No stock data found for '{ticker}'."
 
-        price = info["Close"].iloc[-1]
+        price = quote[0]
         return f"📈 {ticker.upper()} Current Price: {price:.2f} USD"
 
     except Exception as e:
         return f"Error fetching stock price: {str(e)}"
 
 
+@tool
+def get_stock_prices(tickers: List[str]) -> str:
+    """Get the latest prices for several ticker symbols at once, e.g. ["AAPL", "MSFT", "NVDA"].
+    Use this instead of calling get_stock_price repeatedly when comparing stocks."""
+    try:
+        symbols = _normalize_tickers(tickers)
+        if not symbols:
+            return "No ticker symbols given."
+        quotes = fetch_quotes(symbols)
+
+        lines = []
+        for ticker in symbols:
+            quote = quotes.get(ticker)
+            if quote is None:
+                lines.append(f"• {ticker}: no data found")
+                continue
+            price, previous = quote
+            change = f" ({(price - previous) / previous * 100:+.2f}% today)" if previous else ""
+            lines.append(f"• {ticker}: {price:.2f} USD{change}")
+
+        return "📈 Current Prices:\n" + "\n".join(lines)
+
+    except Exception as e:
+        return f"Error fetching stock prices: {str(e)}"
+
+
 @tool
 def get_company_info(ticker: str) -> str:
     """Get company name, sector, and market cap for a given stock ticker."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
+        info = fetch_fundamentals(ticker)
 
-        name = info.get("longName", "Unknown")
-        sector = info.get("sector", "Unknown")
-        mc = info.get("marketCap", "N/A")
+        name = info["name"]
+        sector = info["sector"]
+        mc = info["market_cap"]
 
         return (
             f"🏢 {name}\n"
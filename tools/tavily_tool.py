@@ -2,12 +2,33 @@ import os
 from dotenv import load_dotenv
 from langchain_tavily import TavilySearch
 
+from services.cassette import cassette
+from services.rate_limiter import rate_limiter
+
 load_dotenv()
 
+
+class RateLimitedTavilySearch(TavilySearch):
+    """TavilySearch that queues for a Tavily slot instead of bursting into 429s."""
+
+    @staticmethod
+    def _cassette_key(args, kwargs) -> list:
+        return [list(args), {k: v for k, v in kwargs.items() if k != "run_manager"}]
+
+    def _run(self, *args, **kwargs):
+        run = super()._run
+        with rate_limiter.slot("tavily"):
+            return cassette.call("tavily.search", self._cassette_key(args, kwargs), lambda: run(*args, **kwargs))
+
+    async def _arun(self, *args, **kwargs):
+        arun = super()._arun
+        async with rate_limiter.aslot("tavily"):
+            return await cassette.acall("tavily.search", self._cassette_key(args, kwargs), lambda: arun(*args, **kwargs))
+
 # ==========================
 # TAVILY SEARCH TOOL
 # ==========================
-tavily_tool = TavilySearch(
+tavily_tool = RateLimitedTavilySearch(
     max_results=4,
     topic="general",
     api_key=os.getenv("TAVILY_API_KEY")
@@ -1,30 +1,177 @@
+import contextvars
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
 from dotenv import load_dotenv
-from langchain_community.document_loaders import WeatherDataLoader
 from langchain.tools import tool
+from loguru import logger
+from pyowm import OWM
+
+from services.cassette import cassette
+from services.rate_limiter import rate_limiter
+from tools.output import with_failures
 
 load_dotenv()
 
 # ==========================
-# WEATHER TOOL
+# WEATHER CONFIGURATION
+# ==========================
+# City -> coordinates never changes, so geocodes are kept on disk for good
+WEATHER_GEOCODE_FILE = os.getenv("WEATHER_GEOCODE_FILE", "weather_geocode.json")
+WEATHER_OBSERVATION_TTL = int(os.getenv("WEATHER_OBSERVATION_TTL", "600"))
+WEATHER_MAX_WORKERS = int(os.getenv("WEATHER_MAX_WORKERS", "4"))
+
+
+class WeatherService:
+    """One OpenWeatherMap client with a permanent geocode cache and a short observation cache."""
+
+    def __init__(self):
+        self._owm = None
+        self._geocodes: Optional[Dict[str, list]] = None
+        self._observations: Dict[Tuple[float, float], tuple] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def owm(self) -> OWM:
+        if self._owm is None:
+            with self._lock:
+                if self._owm is None:
+                    self._owm = OWM(os.getenv("OPENWEATHERMAP_API_KEY"))
+        return self._owm
+
+    def _load_geocodes(self) -> Dict[str, list]:
+        if self._geocodes is None:
+            try:
+                with open(WEATHER_GEOCODE_FILE, encoding="utf-8") as f:
+                    self._geocodes = json.load(f)
+            except (OSError, ValueError):
+                self._geocodes = {}
+        return self._geocodes
+
+    def geocode(self, city: str) -> Optional[list]:
+        """Return [lat, lon, name, country] for a city, or None when it is unknown."""
+        key = " ".join(city.lower().split())
+        with self._lock:
+            cached = self._load_geocodes().get(key)
+        if cached:
+            return cached
+
+        with rate_limiter.slot("openweathermap"):
+            entry = cassette.call("openweathermap.geocode", city, lambda: self._fetch_geocode(city))
+        if entry is None:
+            return None
+        with self._lock:
+            geocodes = self._load_geocodes()
+            geocodes[key] = entry
+            temp_path = f"{WEATHER_GEOCODE_FILE}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(geocodes, f)
+            os.replace(temp_path, WEATHER_GEOCODE_FILE)
+        return entry
+
+    def _fetch_geocode(self, city: str) -> Optional[list]:
+        locations = self.owm.geocoding_manager().geocode(city, limit=1)
+        if not locations:
+            return None
+        location = locations[0]
+        return [location.lat, location.lon, location.name, location.country]
+
+    def _fetch_observation(self, lat: float, lon: float) -> dict:
+        weather = self.owm.weather_manager().weather_at_coords(lat, lon).weather
+        temperature = weather.temperature("celsius")
+        return {
+            "detailed_status": weather.detailed_status,
+            "temp": temperature.get("temp"),
+            "feels_like": temperature.get("feels_like"),
+            "temp_max": temperature.get("temp_max"),
+            "temp_min": temperature.get("temp_min"),
+            "humidity": weather.humidity,
+            "wind_speed": weather.wind().get("speed"),
+            "clouds": weather.clouds,
+            "rain": weather.rain.get("1h") if weather.rain else None,
+        }
+
+    def report(self, city: str) -> str:
+        """Formatted current weather for a city (observations are reused for a few minutes)."""
+        location = self.geocode(city)
+        if location is None:
+            return f"No weather data found for {city}."
+        lat, lon, name, country = location
+
+        now = time.time()
+        with self._lock:
+            cached = self._observations.get((lat, lon))
+        if cached and now - cached[1] < WEATHER_OBSERVATION_TTL:
+            return cached[0]
+
+        with rate_limiter.slot("openweathermap"):
+            weather = cassette.call("openweathermap.weather", [lat, lon], lambda: self._fetch_observation(lat, lon))
+
+        report = (
+            f"🌤 Weather in {name}, {country}:\n"
+            f"Detailed status: {weather['detailed_status']}\n"
+            f"Temperature: {weather['temp']}°C "
+            f"(feels like {weather['feels_like']}°C, "
+            f"high {weather['temp_max']}°C, low {weather['temp_min']}°C)\n"
+            f"Humidity: {weather['humidity']}%\n"
+            f"Wind: {weather['wind_speed']} m/s\n"
+            f"Cloud cover: {weather['clouds']}%"
+        )
+        if weather["rain"]:
+            report += f"\nRain (last hour): {weather['rain']} mm"
+
+        with self._lock:
+            self._observations[(lat, lon)] = (report, now)
+        return report
+
+
+weather_service = WeatherService()
+
+# ==========================
+# WEATHER TOOLS
 # ==========================
 
 @tool
 def get_weather(city: str) -> str:
     """Get current weather for a city using OpenWeatherMap."""
     try:
-        loader = WeatherDataLoader.from_params(
-            [city],
-            openweathermap_api_key=os.getenv("OPENWEATHERMAP_API_KEY")
-        )
+        return weather_service.report(city)
+
+    except Exception as e:
+        return f"Error fetching weather: {str(e)}"
 
-        docs = loader.load()  # returns list of Document objects
-        if not docs:
-            return f"No weather data found for {city}."
 
-        data = docs[0].page_content  # raw text
+@tool
+def get_weather_multi(cities: List[str]) -> str:
+    """Get current weather for several cities at once, e.g. ["Goa", "Mumbai"].
+    Use this instead of calling get_weather once per city."""
+    cities = list(dict.fromkeys(c.strip() for c in cities if c and c.strip()))
+    if not cities:
+        return "No cities given."
 
-        return f"🌤 Weather in {city.title()}:\n{data}"
+    def report(city: str) -> Tuple[Optional[str], Optional[str]]:
+        """(report, None) on success, (None, reason) on failure."""
+        try:
+            location = weather_service.geocode(city)
+            if location is None:
+                return None, "city not found"
+            return weather_service.report(city), None
+        except Exception as e:
+            logger.warning(f"Weather lookup failed for {city}: {e}")
+            return None, str(e)
 
-    except Exception as e:
-        return f"Error fetching weather: {str(e)}"
+    # Each worker runs in a copy of this context - keeps the rate-limit priority and trace span
+    with ThreadPoolExecutor(max_workers=min(WEATHER_MAX_WORKERS, len(cities)), thread_name_prefix="weather") as pool:
+        futures = [pool.submit(contextvars.copy_context().run, report, city) for city in cities]
+        results = dict(zip(cities, (future.result() for future in futures)))
+
+    reports = [text for text, _ in results.values() if text]
+    failures = {city: error for city, (_, error) in results.items() if error}
+    if not reports:
+        return "❌ Error fetching weather: " + "; ".join(f"{city} ({error})" for city, error in failures.items())
+    # Failed cities go in a marked section, so a partial answer is never passed off as complete
+    return with_failures("\n\n".join(reports), failures)